@@ -0,0 +1,57 @@
+"""
+Measure the per-request overhead of the Prometheus instrumentation on /generate.
+Run from the backend directory: python benchmarks/bench_metrics.py
+"""
+
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import (
+    CHUNKS_PER_REQUEST, UPSTREAM_IN_FLIGHT, observe_upstream, record_audio_bytes, record_cache, time_stage,
+)
+
+CHUNKS = 3
+
+
+def instrumented_request():
+    """Every metrics call a 3-chunk WAV /generate request makes, with no real work."""
+    with time_stage("emotion_analysis"):
+        pass
+    with time_stage("split_text"):
+        pass
+    CHUNKS_PER_REQUEST.observe(CHUNKS)
+    with time_stage("upstream_tts"):
+        for _ in range(CHUNKS):
+            started = time.perf_counter()
+            with UPSTREAM_IN_FLIGHT.track_inprogress():
+                pass
+            observe_upstream("ssfm-v21", 1000, time.perf_counter() - started)
+    with time_stage("combine_audio"):
+        pass
+    with time_stage("base64_encode"):
+        pass
+    record_audio_bytes("wav", 1_000_000)
+    record_cache("metadata_catalog", True)
+
+
+def bare_request():
+    """The same control flow without instrumentation."""
+    for _ in range(CHUNKS):
+        time.perf_counter()
+
+
+def main():
+    number = 20_000
+    instrumented = min(timeit.repeat(instrumented_request, number=number, repeat=5)) / number
+    bare = min(timeit.repeat(bare_request, number=number, repeat=5)) / number
+    print(f"instrumented request: {instrumented * 1e6:7.2f} us")
+    print(f"bare request:         {bare * 1e6:7.2f} us")
+    print(f"overhead per request: {(instrumented - bare) * 1e6:7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark sentence segmentation and chunk planning on long CJK and Latin inputs.
+Run from the backend directory: python benchmarks/bench_segmenter.py
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_segmenter import split_sentences
+from typecast_service import TypecastService
+
+LEGACY_SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+
+SAMPLES = {
+    "ja": ("今日はとても良い天気ですね", "駅までの道を教えてください", "本当にありがとうございました", "また明日お会いしましょう"),
+    "zh": ("今天天气非常好", "请告诉我去车站的路", "非常感谢你的帮助", "我们明天再见"),
+    "ko": ("오늘은 날씨가 정말 좋네요", "역까지 가는 길을 알려주세요", "정말 감사합니다", "내일 다시 만나요"),
+    "en": ("The weather is lovely today", "Please tell me the way to the station", "Thank you so much", "See you again tomorrow"),
+}
+
+TERMINATORS = {
+    "ja": ("。", "！", "？", "」。"),
+    "zh": ("。", "！", "？", "。"),
+    "ko": (". ", "! ", "? ", ". "),
+    "en": (". ", "! ", "? ", ". "),
+}
+
+
+def make_text(language: str, size: int, seed: int = 42) -> str:
+    """Build a reproducible synthetic text of roughly size characters."""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(SAMPLES[language])
+        if language == "ja" and rng.random() < 0.2:
+            sentence = "「" + sentence
+        piece = sentence + rng.choice(TERMINATORS[language])
+        parts.append(piece)
+        length += len(piece)
+    return "".join(parts)
+
+
+def bench(label: str, func, number: int) -> float:
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print(f"  {label:<28} {seconds * 1000:9.3f} ms")
+    return seconds
+
+
+def main():
+    service = TypecastService()
+    for language in ("ja", "zh", "ko", "en"):
+        for size in (10_000, 100_000, 1_000_000):
+            text = make_text(language, size)
+            number = max(1, 2_000_000 // size)
+            print(f"{language} {size:>9,} chars")
+            bench("legacy re.split", lambda: LEGACY_SENTENCE_RE.split(text), number)
+            bench("split_sentences", lambda: split_sentences(text), number)
+            bench("_split_text", lambda: service._split_text(text), number)
+
+            legacy = LEGACY_SENTENCE_RE.split(text)
+            chunks = service._split_text(text)
+            lengths = [len(chunk) for chunk in chunks]
+            print(f"  sentences: legacy={len(legacy):,} segmenter={len(split_sentences(text)):,}")
+            print(f"  chunks: {len(chunks)} (min {min(lengths)}, max {max(lengths)})")
+
+
+if __name__ == "__main__":
+    main()
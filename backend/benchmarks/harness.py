@@ -0,0 +1,145 @@
+"""
+Minimal benchmark harness: timing, peak memory and JSON baselines.
+"""
+
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class Result:
+    """Timing and memory for one benchmark case."""
+    name: str
+    ops_per_sec: float
+    mean_s: float
+    min_s: float
+    stdev_s: float
+    iterations: int
+    peak_bytes: int
+
+
+def measure(name: str, func: Callable[[], object], min_time: float = 0.5,
+            repeat: int = 5, max_time: float = 30.0) -> Result:
+    """
+    Time func and record its peak traced memory.
+
+    The iteration count per repeat is scaled so one repeat takes about
+    min_time / repeat; slow cases stop early once max_time is spent.
+    """
+    func()  # Warm-up (also fills lazy caches)
+
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / repeat or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / repeat / 10 else 2
+
+    samples: List[float] = [elapsed / number]
+    spent = elapsed
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(samples) < repeat and spent < max_time:
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            elapsed = time.perf_counter() - started
+            spent += elapsed
+            samples.append(elapsed / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mean = statistics.fmean(samples)
+    return Result(
+        name=name,
+        ops_per_sec=1.0 / min(samples),
+        mean_s=mean,
+        min_s=min(samples),
+        stdev_s=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        iterations=number * len(samples),
+        peak_bytes=peak,
+    )
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def save_baseline(results: List[Result], path: str) -> None:
+    document = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "revision": _git_revision(),
+        },
+        "results": {r.name: asdict(r) for r in results},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, factor in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return f"{seconds / factor:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def report(results: List[Result], baseline: Optional[Dict[str, Dict]] = None,
+           threshold: float = 0.10) -> List[str]:
+    """Print a results table, with deltas against baseline if given. Returns regressed case names."""
+    regressions = []
+    header = f"{'benchmark':<44} {'ops/sec':>12} {'mean':>11} {'peak mem':>10}"
+    if baseline:
+        header += f" {'vs base':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        line = f"{r.name:<44} {r.ops_per_sec:>12,.1f} {_format_seconds(r.mean_s):>11} {_format_bytes(r.peak_bytes):>10}"
+        if baseline and r.name in baseline:
+            before = baseline[r.name]["ops_per_sec"]
+            change = (r.ops_per_sec - before) / before
+            line += f" {change:>+8.1%}"
+            if change < -threshold:
+                line += "  REGRESSION"
+                regressions.append(r.name)
+        print(line)
+    return regressions
@@ -0,0 +1,83 @@
+"""
+Reproducible synthetic inputs for the benchmark suite. Every generator is seeded.
+"""
+
+import json
+import os
+import random
+import struct
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SENTENCES = (
+    "I love how bright the morning feels today!",
+    "Unfortunately the train was late again, and I missed the meeting.",
+    "This is the worst service I have ever had, it's unacceptable.",
+    "Wow, I can't wait to see the fireworks tonight!",
+    "I'm worried something dangerous is hiding in the dark...",
+    "The quarterly report is attached for your review.",
+    "Please remember to water the plants on Tuesday.",
+    "Are you sure?? That sounds terrifying.",
+    "Thanks so much for the wonderful gift :)",
+    "We will resume the lecture after a short break.",
+)
+
+
+def make_text(size: int, seed: int = 1) -> str:
+    """English-like text of exactly size characters built from emotional and neutral sentences."""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+        if rng.random() < 0.1:
+            parts.append("\n")
+    return " ".join(parts)[:size]
+
+
+def make_wav(data_bytes: int, sample_rate: int = 44100, seed: int = 1) -> bytes:
+    """A mono 16-bit PCM WAV with a standard 44-byte header and pseudo-random samples."""
+    rng = random.Random(seed)
+    data = rng.randbytes(data_bytes)
+    header = b"RIFF" + struct.pack("<I", 36 + data_bytes) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+    header += b"data" + struct.pack("<I", data_bytes)
+    return header + data
+
+
+def make_wav_segments(count: int, seconds: float = 0.5) -> List[bytes]:
+    """count WAV segments of the given length, as returned per chunk by the TTS API."""
+    data_bytes = int(44100 * 2 * seconds)
+    return [make_wav(data_bytes, seed=i) for i in range(count)]
+
+
+def _catalog_names() -> List[str]:
+    with open(os.path.join(BACKEND_DIR, "language_data.json"), "r", encoding="utf-8") as f:
+        return list(json.load(f))
+
+
+def make_voices(count: int, seed: int = 1) -> List[Dict]:
+    """A raw /v1/voices response of count voices mixing known, partial and unknown names."""
+    rng = random.Random(seed)
+    known = _catalog_names()
+    voices = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.5:
+            name = rng.choice(known)
+        elif roll < 0.75:
+            name = f"{rng.choice(known)} ({rng.choice(['Happy', 'Calm', 'Story'])})"
+        elif roll < 0.85:
+            name = rng.choice(["민준", "서연", "はると", "さくら"]) + str(i)
+        else:
+            name = f"Voice{i}" + rng.choice(["", " (M)", " (F)", " Male"])
+        voices.append({
+            "voice_id": f"tc_{i:024x}",
+            "voice_name": name,
+            "model": "ssfm-v21",
+            "emotions": ["normal", "happy", "sad", "angry"][: rng.randint(1, 4)],
+        })
+    return voices
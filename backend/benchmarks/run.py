@@ -0,0 +1,101 @@
+"""
+Microbenchmarks for the pure-Python hot paths.
+
+Run from the backend directory:
+    python benchmarks/run.py                       # full suite
+    python benchmarks/run.py --quick -k split      # small inputs, matching cases only
+    python benchmarks/run.py --save base.json      # write a baseline
+    python benchmarks/run.py --compare base.json   # diff against a baseline
+"""
+
+import argparse
+import os
+import sys
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from emotion_analyzer import EmotionAnalyzer
+from harness import load_baseline, measure, report, save_baseline
+from inputs import make_text, make_voices, make_wav_segments
+from metadata_catalog import MetadataCatalog
+from typecast_service import TypecastService
+from voice_enrichment import enrich_voices
+
+TEXT_SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+WAV_SEGMENTS = (1, 10, 100, 500)
+CATALOG_SIZES = (100, 1_000, 10_000)
+
+# Largest inputs used with --quick
+QUICK_LIMITS = {"text": 100_000, "wav": 100, "catalog": 1_000}
+
+
+def _label(size: int) -> str:
+    for unit, factor in (("MB", 1_000_000), ("KB", 1_000)):
+        if size >= factor:
+            return f"{size // factor}{unit}"
+    return str(size)
+
+
+def build_cases(quick: bool) -> List[Tuple[str, Callable[[], object]]]:
+    service = TypecastService()
+    analyzer = EmotionAnalyzer()
+    meta = MetadataCatalog().get()
+    cases = []
+
+    for size in TEXT_SIZES:
+        if quick and size > QUICK_LIMITS["text"]:
+            continue
+        text = make_text(size)
+        label = _label(size)
+        cases.append((f"split_text[{label}]", lambda text=text: service._split_text(text)))
+        cases.append((f"emotion.analyze[{label}]", lambda text=text: analyzer.analyze(text)))
+        cases.append((f"emotion.analyze_sentences[{label}]", lambda text=text: analyzer.analyze_sentences(text)))
+
+    for count in WAV_SEGMENTS:
+        if quick and count > QUICK_LIMITS["wav"]:
+            continue
+        segments = make_wav_segments(count)
+        cases.append((f"combine_wav[{count} segments]", lambda s=segments: service._combine_wav_audio(s)))
+
+    for count in CATALOG_SIZES:
+        if quick and count > QUICK_LIMITS["catalog"]:
+            continue
+        voices = make_voices(count)
+        names = [v["voice_name"] for v in voices]
+        resolve = meta.resolver.resolve
+        cases.append((f"detect_language[{count} voices]", lambda n=names: [resolve(name) for name in n]))
+        cases.append((f"voices_enrichment[{count} voices]", lambda v=voices: enrich_voices(v, meta)))
+
+    return cases
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", help="Only run cases whose name contains this substring")
+    parser.add_argument("--quick", action="store_true", help="Skip the largest inputs")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Target seconds per case")
+    parser.add_argument("--save", metavar="PATH", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = []
+    for name, func in build_cases(args.quick):
+        if args.filter and args.filter not in name:
+            continue
+        results.append(measure(name, func, min_time=args.min_time))
+        print(f"  done {name}", file=sys.stderr)
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"\nSaved baseline to {args.save}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Cancellation - Cooperative cancellation and deadlines for a render.
+
+A CancelToken is created per request and passed down to generate_speech. It is
+cancelled when the client disconnects, when a sibling part of the same request
+fails, or implicitly once its deadline passes. The render checks it while
+waiting for chunks: queued chunks are cancelled, in-flight ones are abandoned
+(their audio still lands in the cache) and the request returns at once instead
+of waiting for audio nobody will receive. Upstream calls made on behalf of the
+token time out at its deadline.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+# Longest a generate request may take, and the default when a request sets no timeout
+GENERATE_TIMEOUT = float(os.getenv("GENERATE_TIMEOUT", 300))
+# Deadline budget per batch item: a batch renders at bulk priority, so it may
+# take far longer than one generate request
+BATCH_ITEM_TIMEOUT = float(os.getenv("BATCH_ITEM_TIMEOUT", 20))
+
+
+class RenderCancelled(Exception):
+    """Raised inside a render whose token was cancelled or whose deadline passed."""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+        super().__init__(reason)
+
+
+class CancelToken:
+    """
+    Cancellation flag with an optional deadline, shared by every part of one request.
+
+    Args:
+        timeout: Seconds from now until the deadline, or None for no deadline
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self.finished = False  # Set by the owner once the request is over; stops watchers
+
+    def cancel(self, reason: str = "CANCELLED: render cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("DEADLINE_EXCEEDED: the render did not finish before its deadline")
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def check(self) -> None:
+        """Raise RenderCancelled if the render should stop."""
+        if self.cancelled:
+            raise RenderCancelled(self.reason)
+
+
+def batch_timeout_limit(items: int) -> float:
+    """Longest a batch of the given size may take: BATCH_ITEM_TIMEOUT per item, at least GENERATE_TIMEOUT."""
+    return max(GENERATE_TIMEOUT, items * BATCH_ITEM_TIMEOUT)
+
+
+def request_token(timeout: Optional[float], limit: float = GENERATE_TIMEOUT) -> CancelToken:
+    """Token for an API request, with its timeout capped at limit (GENERATE_TIMEOUT by default)."""
+    if timeout is None or timeout <= 0:
+        timeout = limit
+    return CancelToken(min(timeout, limit))
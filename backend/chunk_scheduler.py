@@ -0,0 +1,143 @@
+"""
+Chunk Scheduler - One worker pool for every upstream TTS chunk in the process.
+
+Requests no longer get their own ThreadPoolExecutor; they submit chunks here.
+A fixed set of workers bounds total upstream concurrency, and a chunk only
+starts when its API key is below that key's concurrency limit. Chunks whose
+key is at its limit are skipped rather than blocking the queue, so one busy
+key cannot hold up work for others.
+
+Every chunk has a priority class. Queued interactive work (previews, live
+streaming) always starts before standard work (/generate), which starts before
+bulk work (batches, background prerendering). Bulk work is also capped to a
+share of the workers and never takes a key's last free slot, so a long
+audiobook batch leaves room for the next interactive request to start at once
+instead of queueing behind it.
+"""
+
+import concurrent.futures
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from key_limits import KeyConcurrencyLimiter
+from metrics import SCHEDULER_QUEUED, SCHEDULER_WAIT_SECONDS
+
+# Upstream TTS calls in flight across all requests in this process
+TTS_WORKERS = int(os.getenv("TTS_WORKERS", 16))
+
+# Priority classes, highest first
+PRIORITIES = ("interactive", "standard", "bulk")
+
+# Largest fraction of the workers that bulk chunks may occupy at once
+BULK_SHARE = float(os.getenv("TTS_BULK_SHARE", 0.5))
+
+
+class _Task:
+    __slots__ = ("key", "priority", "future", "context", "fn", "args", "queued_at")
+
+    def __init__(self, key: str, priority: str, fn: Callable, args: tuple):
+        self.key = key
+        self.priority = priority
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        # Run in a copy of the submitter's context so logs keep the request id
+        self.context = contextvars.copy_context()
+        self.fn = fn
+        self.args = args
+        self.queued_at = time.perf_counter()
+
+
+class ChunkScheduler:
+    """
+    Shared pool running chunk tasks under global and per-key concurrency limits.
+
+    Args:
+        key_limits: Source of each API key's concurrency limit
+        workers: Maximum tasks running at once across all keys
+        bulk_share: Fraction of the workers bulk tasks may occupy at once
+    """
+
+    def __init__(self, key_limits: KeyConcurrencyLimiter, workers: int = TTS_WORKERS,
+                 bulk_share: float = BULK_SHARE):
+        self.key_limits = key_limits
+        self.workers = workers
+        self.bulk_limit = max(1, int(workers * bulk_share))
+        self._queues: Dict[str, deque] = {priority: deque() for priority in PRIORITIES}
+        self._active: Dict[str, int] = {}
+        self._running: Dict[str, int] = {priority: 0 for priority in PRIORITIES}
+        self._condition = threading.Condition()
+        self._threads = []
+        self._queued_gauges = {priority: SCHEDULER_QUEUED.labels(priority) for priority in PRIORITIES}
+        self._wait_histograms = {priority: SCHEDULER_WAIT_SECONDS.labels(priority) for priority in PRIORITIES}
+
+    def _start(self) -> None:
+        # Called with the condition held; workers start on first use
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"tts-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def submit(self, api_key: str, fn: Callable, *args, priority: str = "standard") -> concurrent.futures.Future:
+        """Queue fn(*args) for a worker; returns a Future for its result."""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority: {priority}")
+        task = _Task(self.key_limits.key_id(api_key), priority, fn, args)
+        with self._condition:
+            self._start()
+            self._queues[priority].append(task)
+            self._queued_gauges[priority].inc()
+            self._condition.notify()
+        return task.future
+
+    def _key_limit(self, key: str, priority: str) -> int:
+        limit = self.key_limits.limit_for_id(key)
+        if priority == "bulk" and limit > 1:
+            # Keep one of the key's slots for its interactive and standard work
+            limit -= 1
+        return limit
+
+    def _next(self) -> Optional[_Task]:
+        """Pop the oldest startable task of the highest class that has one (condition held)."""
+        for priority in PRIORITIES:
+            if priority == "bulk" and self._running["bulk"] >= self.bulk_limit:
+                continue
+            queue = self._queues[priority]
+            saturated = set()
+            for index, task in enumerate(queue):
+                if task.key in saturated:
+                    continue
+                if self._active.get(task.key, 0) < self._key_limit(task.key, priority):
+                    del queue[index]
+                    self._queued_gauges[priority].dec()
+                    return task
+                saturated.add(task.key)
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                task = self._next()
+                while task is None:
+                    self._condition.wait()
+                    task = self._next()
+                self._active[task.key] = self._active.get(task.key, 0) + 1
+                self._running[task.priority] += 1
+
+            self._wait_histograms[task.priority].observe(time.perf_counter() - task.queued_at)
+            try:
+                if task.future.set_running_or_notify_cancel():
+                    try:
+                        task.future.set_result(task.context.run(task.fn, *task.args))
+                    except BaseException as e:
+                        task.future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._active[task.key] -= 1
+                    if not self._active[task.key]:
+                        del self._active[task.key]
+                    self._running[task.priority] -= 1
+                    # A slot for this key opened up; any idle worker may now take its next task
+                    self._condition.notify_all()
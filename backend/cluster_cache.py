@@ -0,0 +1,188 @@
+"""
+Cluster Cache - Shards the shared cache across backend nodes by consistent hashing.
+
+Every node is configured with the same peer list. Each cache key has one owner
+node on the hash ring; other nodes read and write that key on the owner over
+HTTP (the /internal/cache endpoints in main.py), so a script rendered through
+any node is a hit on every node. A peer that fails is marked down for a short
+while and its keys fall back to the local cache until it recovers.
+
+Configuration (clustering is off unless CLUSTER_PEERS is set):
+    CLUSTER_PEERS   Comma-separated base URLs of all nodes, e.g.
+                    http://10.0.0.1:8000,http://10.0.0.2:8000
+    CLUSTER_SELF    This node's base URL, exactly as listed in CLUSTER_PEERS
+    CLUSTER_SECRET  Shared secret required on /internal/cache requests; the
+                    cluster cache stays off without it
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+
+from metrics import record_peer_request
+from shared_cache import SharedCache
+from structured_logging import log_event
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-cluster-secret"
+
+# Virtual nodes per peer; more gives a more even key spread
+VIRTUAL_NODES = 128
+
+# Seconds to wait on a peer before falling back to the local cache
+PEER_TIMEOUT = float(os.getenv("CLUSTER_PEER_TIMEOUT", 0.5))
+
+# Slowest transfer rate (bytes per second) allowed for an entry sent to a peer;
+# a write waits PEER_TIMEOUT plus the time its value takes at this rate
+PEER_WRITE_BYTES_PER_SECOND = float(os.getenv("CLUSTER_PEER_WRITE_RATE", 8 * 1024 * 1024))
+
+# Seconds a failed peer is skipped before it is tried again
+PEER_RETRY_AFTER = 10.0
+
+# Largest entry a peer may store on this node (rendered audio is the biggest)
+PEER_MAX_VALUE_BYTES = int(os.getenv("CLUSTER_MAX_VALUE_BYTES", 32 * 1024 * 1024))
+
+
+def write_timeout(size: int) -> Tuple[float, float]:
+    """(connect, read) timeout for storing a value of size bytes on a peer."""
+    return PEER_TIMEOUT, PEER_TIMEOUT + size / PEER_WRITE_BYTES_PER_SECOND
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to nodes, with virtual nodes."""
+
+    def __init__(self, nodes: List[str], vnodes: int = VIRTUAL_NODES):
+        self.nodes = sorted(set(nodes))
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, key: str) -> str:
+        """Return the node owning key (the first ring point clockwise of its hash)."""
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+class ClusterCache:
+    """
+    SharedCache-compatible cache that stores each key on its owner node.
+
+    Keys owned by this node go straight to the local SharedCache; the rest
+    are fetched from and written to the owning peer.
+    """
+
+    def __init__(self, local: SharedCache, peers: List[str], self_url: str, secret: str):
+        self.local = local
+        self.self_url = self_url.rstrip("/")
+        self.ring = HashRing([p.rstrip("/") for p in peers] + [self.self_url])
+        self.secret = secret
+        self._down_until: Dict[str, float] = {}
+        self._sessions = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._sessions, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers[SECRET_HEADER] = self.secret
+            self._sessions.session = session
+        return session
+
+    def _owner(self, namespace: str, key: str) -> Optional[str]:
+        """Return the peer URL owning the key, or None if this node should handle it locally."""
+        owner = self.ring.node_for(f"{namespace}/{key}")
+        if owner == self.self_url or time.monotonic() < self._down_until.get(owner, 0.0):
+            return None
+        return owner
+
+    def _peer_failed(self, peer: str, op: str, error: Exception) -> None:
+        self._down_until[peer] = time.monotonic() + PEER_RETRY_AFTER
+        record_peer_request(op, "error")
+        log_event(logger, "cluster.peer_failed", logging.WARNING, peer=peer, op=op, error=str(error))
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        owner = self._owner(namespace, key)
+        if owner is None:
+            return self.local.get(namespace, key)
+        try:
+            response = self._session().get(
+                f"{owner}/internal/cache/{quote(namespace, safe='')}/{quote(key, safe='')}",
+                timeout=PEER_TIMEOUT,
+            )
+            if response.status_code == 404:
+                record_peer_request("get", "miss")
+                return None
+            response.raise_for_status()
+            record_peer_request("get", "hit")
+            return response.content
+        except requests.RequestException as e:
+            self._peer_failed(owner, "get", e)
+            return self.local.get(namespace, key)
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        owner = self._owner(namespace, key)
+        if owner is None:
+            self.local.set(namespace, key, value, ttl)
+            return
+        try:
+            response = self._session().put(
+                f"{owner}/internal/cache/{quote(namespace, safe='')}/{quote(key, safe='')}",
+                params={"ttl": ttl} if ttl else None,
+                data=value,
+                timeout=write_timeout(len(value)),
+            )
+            response.raise_for_status()
+            record_peer_request("set", "ok")
+        except requests.RequestException as e:
+            self._peer_failed(owner, "set", e)
+            self.local.set(namespace, key, value, ttl)
+
+    def get_json(self, namespace: str, key: str) -> Any:
+        value = self.get(namespace, key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set(namespace, key, json.dumps(value, separators=(",", ":")).encode("utf-8"), ttl)
+
+    def delete(self, namespace: str, key: str) -> None:
+        owner = self._owner(namespace, key)
+        if owner is not None:
+            try:
+                self._session().delete(
+                    f"{owner}/internal/cache/{quote(namespace, safe='')}/{quote(key, safe='')}",
+                    timeout=PEER_TIMEOUT,
+                ).raise_for_status()
+            except requests.RequestException as e:
+                self._peer_failed(owner, "delete", e)
+        self.local.delete(namespace, key)
+
+
+def cache_from_env(local: SharedCache):
+    """Wrap the local cache in a ClusterCache if CLUSTER_PEERS is configured."""
+    peers = [p.strip() for p in os.getenv("CLUSTER_PEERS", "").split(",") if p.strip()]
+    self_url = os.getenv("CLUSTER_SELF")
+    if not peers:
+        return local
+    if not self_url:
+        logger.warning("CLUSTER_PEERS is set but CLUSTER_SELF is not; cluster cache disabled")
+        return local
+    secret = os.getenv("CLUSTER_SECRET")
+    if not secret:
+        # Without it anyone reaching /internal/cache could read or overwrite cached audio
+        logger.error("CLUSTER_PEERS is set but CLUSTER_SECRET is not; cluster cache disabled")
+        return local
+    cache = ClusterCache(local, peers, self_url, secret)
+    logger.info("Cluster cache enabled on %s with %d nodes", cache.self_url, len(cache.ring.nodes))
+    return cache
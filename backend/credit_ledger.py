@@ -0,0 +1,141 @@
+"""
+Credit Ledger - Per-API-key view of remaining Typecast credits, used to reject
+requests that cannot be paid for before any chunk is sent upstream.
+
+Remaining credits are fetched from the subscription endpoint at most once per
+``ttl`` seconds per key. In between, the ledger reserves the estimated cost of
+each request up front and decrements the balance locally as chunks complete,
+so concurrent requests on the same key in one process cannot overspend it
+together. Balances and reservations live in process memory: other workers and
+nodes only see each other's spending once the balance is refetched, so
+together they can overrun it by up to one TTL's worth of requests. If the
+balance cannot be fetched, requests are let through (fail open) and upstream
+remains the final authority.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+from key_limits import key_fingerprint
+from metrics import CREDIT_REJECTIONS, record_cache
+from structured_logging import log_event
+
+logger = logging.getLogger(__name__)
+
+# Typecast bills text-to-speech by input characters
+CREDITS_PER_CHAR = float(os.getenv("CREDITS_PER_CHAR", 1.0))
+
+# Seconds a fetched balance is trusted before asking upstream again
+CREDITS_TTL = float(os.getenv("CREDITS_TTL", 60))
+
+
+def estimate_credits(text: str) -> int:
+    """Estimate the credits needed to synthesize text."""
+    return math.ceil(len(text) * CREDITS_PER_CHAR)
+
+
+class InsufficientCreditsError(Exception):
+    """Raised when a request needs more credits than the key has left."""
+
+    def __init__(self, required: int, remaining: float):
+        self.required = required
+        self.remaining = remaining
+        super().__init__(
+            f"QUOTA_INSUFFICIENT: this request needs about {required} credits "
+            f"but only {max(int(remaining), 0)} remain"
+        )
+
+
+@dataclass
+class _Account:
+    remaining: Optional[float] = None  # None when the balance is unknown
+    reserved: float = 0.0              # Estimated cost of chunks still in flight
+    fetched_at: float = float("-inf")
+
+
+class CreditLedger:
+    """
+    Cached per-key credit balances with up-front reservations, per process.
+
+    Args:
+        fetch_remaining: Callable returning the remaining credits for an API key
+        ttl: Seconds before a balance is refreshed from upstream
+    """
+
+    def __init__(self, fetch_remaining: Callable[[str], float], ttl: float = CREDITS_TTL):
+        self.fetch_remaining = fetch_remaining
+        self.ttl = ttl
+        self._accounts: Dict[str, _Account] = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self, account_id: str, api_key: str) -> None:
+        try:
+            remaining = float(self.fetch_remaining(api_key))
+        except Exception as e:
+            log_event(logger, "credits.fetch_failed", logging.WARNING, error=str(e))
+            remaining = None
+        with self._lock:
+            account = self._accounts.setdefault(account_id, _Account())
+            account.remaining = remaining
+            account.fetched_at = time.monotonic()
+
+    def reserve(self, api_key: str, credits: int, hold: bool = True) -> None:
+        """
+        Reserve credits for a request about to fan out.
+
+        Args:
+            api_key: Typecast API key
+            credits: Estimated cost of the request
+            hold: False to only check the balance without reserving (for a job whose
+                parts reserve their own credits as they start)
+
+        Raises:
+            InsufficientCreditsError: If the known balance cannot cover the request
+        """
+        if credits <= 0:
+            return
+        account_id = key_fingerprint(api_key)
+        account = self._accounts.get(account_id)
+        fresh = account is not None and time.monotonic() - account.fetched_at < self.ttl
+        record_cache("credits", fresh)
+        if not fresh:
+            self._refresh(account_id, api_key)
+
+        with self._lock:
+            account = self._accounts[account_id]
+            if account.remaining is not None and account.remaining - account.reserved < credits:
+                CREDIT_REJECTIONS.inc()
+                raise InsufficientCreditsError(credits, account.remaining - account.reserved)
+            if hold:
+                account.reserved += credits
+
+    def spend(self, api_key: str, credits: int) -> None:
+        """Turn part of a reservation into spent credits once a chunk has completed."""
+        with self._lock:
+            account = self._accounts.get(key_fingerprint(api_key))
+            if account is None:
+                return
+            account.reserved = max(account.reserved - credits, 0.0)
+            if account.remaining is not None:
+                account.remaining -= credits
+
+    def release(self, api_key: str, credits: int) -> None:
+        """Return the unspent part of a reservation (failed or skipped chunks)."""
+        if credits <= 0:
+            return
+        with self._lock:
+            account = self._accounts.get(key_fingerprint(api_key))
+            if account is not None:
+                account.reserved = max(account.reserved - credits, 0.0)
+
+    def mark_exhausted(self, api_key: str) -> None:
+        """Record that upstream rejected a call for lack of credits."""
+        with self._lock:
+            account = self._accounts.setdefault(key_fingerprint(api_key), _Account())
+            account.remaining = 0.0
+            account.fetched_at = time.monotonic()
@@ -3,9 +3,82 @@ Smart Emotion Analyzer - Detects emotions from text using keyword matching and s
 Similar to Typecast.ai's automatic emotion recognition feature.
 """
 
+import itertools
 import re
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 from dataclasses import dataclass
+import numpy as np
+from emotion_lexicons import DETECT_SAMPLE_CHARS, LATIN_STOPWORDS, PACK_LANGUAGES, get_pack, language_evidence
+from text_segmenter import IncrementalSegmenter, split_sentences
+
+TOKEN_RE = re.compile(r"[a-z']+")
+
+# Joins the texts of a batch into one string; no pattern matches it
+BATCH_SEPARATOR = "\x00"
+
+# Below this many texts the fixed cost of the vectorized path outweighs its gain
+BATCH_MIN_TEXTS = 24
+
+# analyze_stream cuts text without a sentence boundary at this length, so a
+# document without punctuation still streams in bounded memory
+STREAM_MAX_SENTENCE_CHARS = 5000
+
+
+def _runs(mask: np.ndarray, min_length: int) -> np.ndarray:
+    """Start positions of maximal runs of True at least min_length long (greedy {n,} matches)."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return starts[ends - starts >= min_length]
+
+
+def _sequence(codes: np.ndarray, *parts: str) -> np.ndarray:
+    """Positions where each following code point is one of the characters in parts[k]."""
+    n = len(codes) - len(parts) + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.int64)
+    mask = np.ones(n, dtype=bool)
+    for k, chars in enumerate(parts):
+        mask &= np.isin(codes[k:k + n], [ord(c) for c in chars])
+    return np.flatnonzero(mask)
+
+
+def _either(*positions: np.ndarray) -> np.ndarray:
+    return np.concatenate(positions)
+
+
+# NumPy equivalents of the punctuation and emoji patterns over a code point
+# array, returning match start positions. Counted patterns are greedy runs, so
+# counting maximal runs gives the same count as re.findall; emoji patterns are
+# only tested for presence. Patterns missing here fall back to the regex.
+_VECTORIZED_PATTERNS = {
+    r'!{2,}': lambda c: _runs(c == ord('!'), 2),
+    r'!': lambda c: np.flatnonzero(c == ord('!')),
+    r'\?{2,}': lambda c: _runs(c == ord('?'), 2),
+    r'\.{3,}': lambda c: _runs(c == ord('.'), 3),
+    r'[A-Z]{3,}': lambda c: _runs((c >= ord('A')) & (c <= ord('Z')), 3),
+    r'[:;]-?\)': lambda c: _either(_sequence(c, ":;", ")"), _sequence(c, ":;", "-", ")")),
+    r'[:;]-?D': lambda c: _either(_sequence(c, ":;", "D"), _sequence(c, ":;", "-", "D")),
+    r'[:;]-?\(': lambda c: _either(_sequence(c, ":;", "("), _sequence(c, ":;", "-", "(")),
+    r'>:-?\(': lambda c: _either(_sequence(c, ">", ":", "("), _sequence(c, ">", ":", "-", "(")),
+    r'D:': lambda c: _sequence(c, "D", ":"),
+    r'😊|😃|😄|😁|🙂': lambda c: _sequence(c, "😊😃😄😁🙂"),
+    r'😢|😭|😞|😔': lambda c: _sequence(c, "😢😭😞😔"),
+    r'😠|😡|🤬': lambda c: _sequence(c, "😠😡🤬"),
+    r'😱|😨|😰': lambda c: _sequence(c, "😱😨😰"),
+    r'🎉|🔥|🚀|✨': lambda c: _sequence(c, "🎉🔥🚀✨"),
+}
+
+
+def _regex_positions(pattern: "re.Pattern"):
+    """Match start positions of a regex, as a feature function over (codes, text)."""
+    return lambda codes, text: np.fromiter((m.start() for m in pattern.finditer(text)), dtype=np.int64)
+
+
+def _feature(pattern: str):
+    vectorized = _VECTORIZED_PATTERNS.get(pattern)
+    if vectorized is not None:
+        return lambda codes, text: vectorized(codes)
+    return _regex_positions(re.compile(pattern))
 
 @dataclass
 class EmotionResult:
@@ -138,12 +211,16 @@ class EmotionAnalyzer:
     def __init__(self):
         """Initialize the emotion analyzer."""
         self.supported_emotions = ["happy", "sad", "angry", "excited", "scared", "normal"]
+        self._tables = None  # Lexicon matrices for analyze_batch, built on first use
+        self._english_keywords = frozenset(
+            keyword for keywords in self.EMOTION_KEYWORDS.values() for keyword in keywords
+        )
     
     def _tokenize(self, text: str) -> List[str]:
         """Simple tokenization - lowercase and split by non-alphanumeric."""
         text_lower = text.lower()
         # Keep some punctuation for pattern matching
-        words = re.findall(r"[a-z']+", text_lower)
+        words = TOKEN_RE.findall(text_lower)
         return words
     
     def _calculate_keyword_scores(self, text: str) -> Dict[str, float]:
@@ -190,21 +267,70 @@ class EmotionAnalyzer:
         
         return scores
     
-    def analyze(self, text: str) -> EmotionResult:
+    @staticmethod
+    def _lexicons(text: str, language: Optional[str]) -> Tuple[Optional[str], bool]:
+        """
+        Keyword lexicons that score text: (pack language or None, whether the
+        built-in English keywords score it too). Latin-script text, and text in
+        no clear majority language, is scored with both.
+        """
+        if language:
+            code = language.lower()[:2]
+            if code not in PACK_LANGUAGES:
+                return None, True
+            return code, code in LATIN_STOPWORDS
+        pack_language, clear = language_evidence(text)
+        return pack_language, pack_language is None or not clear or pack_language in LATIN_STOPWORDS
+
+    @staticmethod
+    def _document_language(text: str, language: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        (Language to split sentences with, language to score every sentence with) for a whole text.
+
+        The whole text decides, so short sentences are not misdetected; text in
+        no clear majority language is split for every script and each sentence
+        is scored on its own evidence.
+        """
+        if language:
+            return language, language
+        detected, clear = language_evidence(text)
+        if not clear:
+            return None, None
+        return detected, detected or "en"
+
+    def analyze(self, text: str, language: Optional[str] = None) -> EmotionResult:
         """
         Analyze text and return the detected emotion with confidence score.
         
         Args:
             text: The input text to analyze
+            language: Optional ISO 639-1 code; detected from the text when omitted
             
         Returns:
             EmotionResult with detected emotion, confidence, and all scores
         """
         if not text or not text.strip():
             return EmotionResult(emotion="normal", confidence=1.0, scores={})
-        
+        return self._analyze(text, *self._lexicons(text, language))
+
+    def _analyze(self, text: str, pack_language: Optional[str], english: bool) -> EmotionResult:
+        """analyze() of non-blank text with the lexicons chosen by _lexicons."""
         # Calculate scores from different sources
-        keyword_scores = self._calculate_keyword_scores(text)
+        if pack_language is not None:
+            pack = get_pack(pack_language)
+            if english:
+                # Keywords both lexicons share (e.g. "terrible") count once, as English
+                english_scores = self._calculate_keyword_scores(text)
+                pack_scores = pack.keyword_scores(text, skip=self._english_keywords)
+                keyword_scores = {
+                    emotion: english_scores[emotion] + pack_scores.get(emotion, 0.0)
+                    for emotion in english_scores
+                }
+            else:
+                keyword_scores = pack.keyword_scores(text)
+            text = pack.normalize_punctuation(text)
+        else:
+            keyword_scores = self._calculate_keyword_scores(text)
         punctuation_scores = self._calculate_punctuation_scores(text)
         emoji_scores = self._calculate_emoji_scores(text)
         
@@ -245,31 +371,243 @@ class EmotionAnalyzer:
             scores={k: round(v, 2) for k, v in combined_scores.items()}
         )
     
-    def analyze_sentences(self, text: str) -> List[SentenceEmotionResult]:
+    def _batch_tables(self):
+        """Vocabulary ids and weight matrices (one column per emotion) for analyze_batch."""
+        if self._tables is None:
+            emotions = list(self.EMOTION_KEYWORDS)
+            words = list(dict.fromkeys(
+                word for keywords in self.EMOTION_KEYWORDS.values() for word in keywords if ' ' not in word
+            ))
+            vocab = {word: i for i, word in enumerate(words)}
+            lexicon = np.zeros((len(words), len(emotions)))  # vocab x emotion
+            phrases = []
+            for column, (emotion, keywords) in enumerate(self.EMOTION_KEYWORDS.items()):
+                for keyword, weight in keywords.items():
+                    if ' ' in keyword:
+                        phrase_weights = np.zeros(len(emotions))
+                        phrase_weights[column] = weight
+                        phrases.append((_regex_positions(re.compile(re.escape(keyword))), phrase_weights))
+                    else:
+                        lexicon[vocab[keyword], column] = weight
+
+            def pattern_rows(patterns):
+                rows = []
+                for pattern, weights in patterns.items():
+                    row = np.zeros(len(emotions))
+                    for emotion, weight in weights.items():
+                        row[emotions.index(emotion)] = weight
+                    rows.append((_feature(pattern), row))
+                return rows
+
+            self._tables = (
+                emotions, vocab, lexicon, phrases,
+                pattern_rows(self.PUNCTUATION_PATTERNS), pattern_rows(self.EMOJI_PATTERNS),
+            )
+        return self._tables
+
+    def analyze_batch(self, texts: List[str], language: Optional[str] = None) -> List[EmotionResult]:
+        """
+        Analyze many texts at once; results are identical to calling analyze() on each.
+
+        Tokens are mapped to vocabulary ids and scored against a vocab x emotion
+        weight matrix, and each punctuation and emoji pattern runs once over
+        the whole batch. Every score is accumulated in the same order as
+        analyze() does it, so the floating-point results match bit for bit.
+        Texts scored by a language pack are analyzed one at a time.
+        
+        Args:
+            texts: The input texts to analyze
+            language: Optional ISO 639-1 code; detected per text when omitted
+            
+        Returns:
+            One EmotionResult per text, in order
+        """
+        lexicons = [self._lexicons(text, language) for text in texts]
+        if not any(pack_language for pack_language, _ in lexicons):
+            return self._analyze_batch_english(texts)
+
+        english = [text for text, (pack_language, _) in zip(texts, lexicons) if pack_language is None]
+        english_results = iter(self._analyze_batch_english(english))
+        return [
+            next(english_results) if lexicon[0] is None
+            else self._analyze(text, *lexicon) if text.strip()
+            else EmotionResult(emotion="normal", confidence=1.0, scores={})
+            for text, lexicon in zip(texts, lexicons)
+        ]
+
+    def _analyze_english(self, text: str) -> EmotionResult:
+        """analyze() with only the built-in English keywords."""
+        if not text or not text.strip():
+            return EmotionResult(emotion="normal", confidence=1.0, scores={})
+        return self._analyze(text, None, True)
+
+    def _analyze_batch_english(self, texts: List[str]) -> List[EmotionResult]:
+        """Vectorized analyze_batch for texts scored with the built-in English keywords."""
+        emotions, vocab, lexicon, phrases, punctuation, emoji = self._batch_tables()
+        n = len(texts)
+        # Scalar fallbacks keep the lexicon the caller chose instead of detecting it again
+        if n < BATCH_MIN_TEXTS:
+            return [self._analyze_english(text) for text in texts]
+        joined = BATCH_SEPARATOR.join(texts)
+        if joined.count(BATCH_SEPARATOR) != n - 1:
+            # A text contains the separator itself; score one at a time
+            return [self._analyze_english(text) for text in texts]
+
+        lowered = [text.lower() for text in texts]
+
+        # Keyword scores: add each row's keyword hits in text order, one hit per row per step
+        tokens = [TOKEN_RE.findall(text) for text in lowered]
+        counts = np.fromiter((len(row) for row in tokens), dtype=np.int64, count=n)
+        ids = np.fromiter(
+            map(vocab.get, itertools.chain.from_iterable(tokens), itertools.repeat(-1)),
+            dtype=np.int64, count=int(counts.sum()),
+        )
+        keyword = np.zeros((n, len(emotions)))
+        if len(ids):
+            hit = ids >= 0
+            hit_rows = np.repeat(np.arange(n), counts)[hit]
+            hit_ids = ids[hit]
+            # Position of each hit among its row's hits
+            first_hit = np.searchsorted(hit_rows, hit_rows)
+            step = np.arange(len(hit_rows)) - first_hit
+            for j in range(int(step.max()) + 1 if len(step) else 0):
+                at = step == j
+                keyword[hit_rows[at]] += lexicon[hit_ids[at]]
+
+        # Pattern features: each runs once over the joined batch (as code points
+        # for the vectorized ones) and its matches are attributed to their text
+        def match_counts(feature, text, codes, separators):
+            return np.bincount(np.searchsorted(separators, feature(codes, text)), minlength=n)
+
+        joined_lowered = BATCH_SEPARATOR.join(lowered)
+        lowered_separators = np.flatnonzero(
+            np.frombuffer(joined_lowered.encode("utf-32-le", "surrogatepass"), dtype=np.uint32) == 0
+        )
+        for feature, weights in phrases:
+            present = match_counts(feature, joined_lowered, None, lowered_separators) > 0
+            keyword += np.where(present[:, None], weights, 0.0)
+
+        codes = np.frombuffer(joined.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        separators = np.flatnonzero(codes == 0)
+        punctuation_scores = np.zeros((n, len(emotions)))
+        for feature, weights in punctuation:
+            matches = np.minimum(match_counts(feature, joined, codes, separators), 3)  # Cap at 3 matches
+            punctuation_scores += weights * matches[:, None]
+        emoji_scores = np.zeros((n, len(emotions)))
+        for feature, weights in emoji:
+            present = (match_counts(feature, joined, codes, separators) > 0).astype(float)
+            emoji_scores += weights * present[:, None]
+
+        # Same combination and decision rules as analyze()
+        combined = keyword * 1.0 + punctuation_scores * 0.5 + emoji_scores * 0.7
+        max_score = combined.max(axis=1)
+        detected = combined.argmax(axis=1)  # First of equal maxima, like max() over the dict
+        total = np.zeros(n)
+        for column in range(len(emotions)):
+            total += combined[:, column]
+        normal_confidence = 1.0 - (max_score / 0.5) * 0.3
+        with np.errstate(divide="ignore", invalid="ignore"):
+            confidence = np.where(total > 0, max_score / total, 0.5)
+        confidence = np.where(max_score > 2.0, np.minimum(confidence * 1.2, 0.98), confidence)
+
+        # round(x, 2) is k / 100 for the nearest integer k to x * 100, except where
+        # x * 100 is within rounding error of a half; those few distinct values
+        # go through round() itself
+        def round2(values):
+            scaled = values * 100
+            rounded = np.rint(scaled) / 100
+            near_half = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-6
+            if near_half.any():
+                unique, inverse = np.unique(values[near_half], return_inverse=True)
+                rounded[near_half] = np.array([round(v, 2) for v in unique.tolist()])[inverse]
+            return rounded.tolist()
+
+        rounded_scores = round2(combined)
+        rounded_confidence = round2(confidence)
+        raw_scores = combined.tolist()
+
+        results = []
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                results.append(EmotionResult(emotion="normal", confidence=1.0, scores={}))
+            elif max_score[i] < 0.5:
+                results.append(EmotionResult(
+                    emotion="normal",
+                    confidence=float(normal_confidence[i]),
+                    scores=dict(zip(emotions, raw_scores[i])),
+                ))
+            else:
+                results.append(EmotionResult(
+                    emotion=emotions[detected[i]],
+                    confidence=rounded_confidence[i],
+                    scores=dict(zip(emotions, rounded_scores[i])),
+                ))
+        return results
+    
+    def analyze_sentences(self, text: str, language: Optional[str] = None) -> List[SentenceEmotionResult]:
         """
         Analyze text sentence by sentence and return emotion for each.
         
         Args:
             text: The input text to analyze
+            language: Optional ISO 639-1 code used to pick sentence terminators
+                and the keyword lexicon; detected from the text when omitted
             
         Returns:
             List of SentenceEmotionResult for each sentence
         """
+        split_language, score_language = self._document_language(text, language)
+
         # Split into sentences
-        sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+        sentences = split_sentences(text.strip(), split_language)
         
-        results = []
-        for sentence in sentences:
-            if sentence.strip():
-                result = self.analyze(sentence)
-                results.append(SentenceEmotionResult(
-                    text=sentence,
-                    emotion=result.emotion,
-                    confidence=result.confidence
-                ))
-        
-        return results
+        sentences = [sentence for sentence in sentences if sentence.strip()]
+        return [
+            SentenceEmotionResult(text=sentence, emotion=result.emotion, confidence=result.confidence)
+            for sentence, result in zip(sentences, self.analyze_batch(sentences, score_language))
+        ]
     
+    def analyze_stream(self, pieces: Iterable[str], language: Optional[str] = None) -> Iterator[SentenceEmotionResult]:
+        """
+        Analyze text that arrives in pieces, yielding each sentence's emotion as it completes.
+
+        Only the open sentence (and, until the language is known, the first
+        DETECT_SAMPLE_CHARS characters) is held in memory, so documents of any
+        size stream in constant memory. The sentences each piece completes are
+        scored together with analyze_batch.
+
+        Args:
+            pieces: The input text in order, split anywhere
+            language: Optional ISO 639-1 code; detected from the start of the text when omitted
+
+        Yields:
+            SentenceEmotionResult for each sentence, in order
+        """
+        segmenter = None
+        sample = []
+        sample_chars = 0
+        score_language = None
+
+        def results(sentences: List[str]) -> Iterator[SentenceEmotionResult]:
+            for sentence, result in zip(sentences, self.analyze_batch(sentences, score_language)):
+                yield SentenceEmotionResult(text=sentence, emotion=result.emotion, confidence=result.confidence)
+
+        for piece in itertools.chain(pieces, [None]):
+            if segmenter is None:
+                # Hold the start of the text back until there is enough to detect its language
+                if piece is not None:
+                    sample.append(piece)
+                    sample_chars += len(piece)
+                    if language is None and sample_chars < DETECT_SAMPLE_CHARS:
+                        continue
+                piece = "".join(sample)
+                sample.clear()
+                split_language, score_language = self._document_language(piece, language)
+                segmenter = IncrementalSegmenter(split_language, max_chars=STREAM_MAX_SENTENCE_CHARS)
+            if piece is not None:
+                yield from results(segmenter.feed(piece))
+        yield from results(segmenter.flush())
+
     def get_dominant_emotion(self, text: str) -> Tuple[str, float]:
         """
         Simple helper to get just the emotion and confidence.
@@ -0,0 +1,218 @@
+"""
+Emotion Lexicons - Per-language keyword packs for the emotion analyzer.
+
+Each pack is a JSON file in this directory (<language>.json) holding emotion
+keywords and the tokenizer that suits the language's script:
+
+- "words":      whitespace-separated words, compared with accents folded
+                (Spanish); keywords containing a space match as phrases
+- "stems":      keywords are stems matched at the start of each
+                space-separated word, so particles and endings still match
+                (Korean: 행복 matches 행복해요, 행복한)
+- "dictionary": no word boundaries; keywords are found by a longest-match
+                scan over the text (Japanese)
+
+A pack is read and its matcher compiled the first time text in its language
+is analyzed, so a deployment that only ever sees English never loads any.
+Text in another script is only scored with a pack alone when that script
+clearly dominates it; mixed text, and all Latin-script text (which freely
+borrows English words), is scored with the pack and the built-in English
+keywords.
+Adding a language is a matter of dropping in a JSON file and, for Latin-script
+languages, listing a few of its stopwords in LATIN_STOPWORDS.
+"""
+
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Callable, Dict, List, Optional, Tuple
+
+from language_resolver import SCRIPT_LANGUAGES
+
+PACK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Languages with a pack in this directory
+PACK_LANGUAGES = frozenset(
+    name[:-len(".json")] for name in os.listdir(PACK_DIR) if name.endswith(".json")
+)
+
+# Language detection only looks at the start of long texts
+DETECT_SAMPLE_CHARS = 2000
+
+# Share of a text's letters a script must make up for the text to count as
+# that script's language alone
+SCRIPT_MAJORITY = 0.5
+# Latin-script text is a pack language throughout when it has at least
+# MIN_STOPWORD_HITS of its stopwords (and marker characters) and they make up
+# LATIN_MAJORITY of all stopwords counted, English ones included
+MIN_STOPWORD_HITS = 2
+LATIN_MAJORITY = 0.75
+
+# Common function words telling a Latin-script language apart from English
+LATIN_STOPWORDS: Dict[str, frozenset] = {
+    "es": frozenset({"el", "la", "los", "las", "que", "de", "del", "y", "es", "esta", "estoy", "muy",
+                     "pero", "por", "para", "con", "una", "un", "se", "su", "lo", "mi", "yo", "tu",
+                     "te", "le", "al", "en", "como", "mucho", "tengo", "estas"}),
+}
+ENGLISH_STOPWORDS = frozenset({"the", "and", "is", "are", "to", "of", "you", "it", "that", "was",
+                               "for", "this", "with", "my", "i", "a", "in", "on", "be", "have"})
+# Characters that only appear in one Latin-script language we have a pack for
+LATIN_MARKERS = {"es": "¿¡ñÑ"}
+
+LATIN_WORD_RE = re.compile(r"[^\W\d_]+")
+LETTER_RE = re.compile(r"[^\W\d_]")
+
+
+def fold_accents(text: str) -> str:
+    """Lowercase and strip diacritics (está -> esta, ñ -> n)."""
+    decomposed = unicodedata.normalize("NFD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def language_evidence(text: str) -> Tuple[Optional[str], bool]:
+    """
+    The pack language with the most evidence in text, and whether it clearly dominates.
+
+    Scripts are recognised with the voice-name heuristics in language_resolver
+    and dominate when they make up SCRIPT_MAJORITY of the letters. Latin-script
+    text counts a pack language's stopwords and marker characters against the
+    English stopwords; it dominates with MIN_STOPWORD_HITS of them (at least one
+    a stopword) making up LATIN_MAJORITY of the total, and is mixed when it has
+    at least as many as English but no such majority.
+
+    Returns:
+        (language, clear); (None, True) when the text is English
+    """
+    sample = text[:DETECT_SAMPLE_CHARS]
+    if not sample.isascii():
+        best, best_count = None, 0
+        for pattern, language in SCRIPT_LANGUAGES:
+            count = len(pattern.findall(sample))
+            if count > best_count and language in PACK_LANGUAGES:
+                best, best_count = language, count
+        if best is not None:
+            return best, best_count >= SCRIPT_MAJORITY * len(LETTER_RE.findall(sample))
+
+    markers = {
+        language: sum(map(sample.count, chars)) for language, chars in LATIN_MARKERS.items()
+    } if not sample.isascii() else {}
+    if not sample.isascii():
+        # Stopwords are ASCII once accents are stripped; anything else cannot match
+        sample = unicodedata.normalize("NFD", sample).encode("ascii", "ignore").decode("ascii")
+    words = LATIN_WORD_RE.findall(sample.lower())
+    english = sum(map(ENGLISH_STOPWORDS.__contains__, words))
+    for language, stopwords in LATIN_STOPWORDS.items():
+        if language not in PACK_LANGUAGES:
+            continue
+        stopword_hits = sum(map(stopwords.__contains__, words))
+        hits = stopword_hits + markers.get(language, 0)
+        if stopword_hits and hits >= MIN_STOPWORD_HITS and hits >= LATIN_MAJORITY * (hits + english):
+            return language, True
+        if hits and hits >= english:
+            return language, False
+    return None, True
+
+
+def detect_language(text: str) -> Optional[str]:
+    """Language of text if a pack language clearly dominates it, else None."""
+    language, clear = language_evidence(text)
+    return language if clear else None
+
+
+class LexiconPack:
+    """
+    A language's emotion keywords with its compiled matcher.
+
+    Args:
+        language: ISO 639-1 code
+        keywords: {emotion: {keyword: weight}}
+        tokenizer: "words", "stems" or "dictionary" (see module docstring)
+        punctuation: Full-width punctuation to map to ASCII before the
+            punctuation and emoji patterns run (e.g. "！" -> "!")
+    """
+
+    def __init__(self, language: str, keywords: Dict[str, Dict[str, float]], tokenizer: str,
+                 punctuation: Optional[Dict[str, str]] = None):
+        self.language = language
+        self.emotions = list(keywords)
+        self.punctuation = str.maketrans(punctuation or {})
+        self._matches = self._compile(keywords, tokenizer)
+
+    def _compile(self, keywords: Dict[str, Dict[str, float]], tokenizer: str) -> Callable[[str], List[str]]:
+        """Build the function returning the keywords found in a text, in order."""
+        # keyword -> [(emotion, weight)], keywords stored the way they are matched
+        self.weights: Dict[str, List[tuple]] = {}
+        for emotion, words in keywords.items():
+            for keyword, weight in words.items():
+                key = fold_accents(keyword) if tokenizer == "words" else keyword
+                self.weights.setdefault(key, []).append((emotion, weight))
+
+        if tokenizer == "words":
+            phrases = [k for k in self.weights if " " in k]
+            phrase_re = re.compile("|".join(map(re.escape, sorted(phrases, key=len, reverse=True)))) if phrases else None
+
+            def matches(text: str) -> List[str]:
+                folded = fold_accents(text)
+                found = [word for word in LATIN_WORD_RE.findall(folded) if word in self.weights]
+                if phrase_re is not None:
+                    found.extend(phrase_re.findall(folded))
+                return found
+            return matches
+
+        # Longest keyword first, so e.g. 楽しみ wins over 楽し
+        alternation = "|".join(map(re.escape, sorted(self.weights, key=len, reverse=True)))
+        if tokenizer == "stems":
+            stem_re = re.compile(alternation)
+
+            def matches(text: str) -> List[str]:
+                found = []
+                for word in text.split():
+                    match = stem_re.match(word)
+                    if match:
+                        found.append(match.group())
+                return found
+            return matches
+
+        if tokenizer == "dictionary":
+            return re.compile(alternation).findall
+
+        raise ValueError(f"Unknown tokenizer for {self.language} lexicon: {tokenizer}")
+
+    def keyword_scores(self, text: str, skip: frozenset = frozenset()) -> Dict[str, float]:
+        """Sum the weights of the keywords found in text, per emotion, ignoring those in skip."""
+        scores = {emotion: 0.0 for emotion in self.emotions}
+        for keyword in self._matches(text):
+            if keyword in skip:
+                continue
+            for emotion, weight in self.weights[keyword]:
+                scores[emotion] += weight
+        return scores
+
+    def normalize_punctuation(self, text: str) -> str:
+        return text.translate(self.punctuation)
+
+
+_packs: Dict[str, LexiconPack] = {}
+_lock = threading.Lock()
+
+
+def get_pack(language: str) -> Optional[LexiconPack]:
+    """The pack for a language, loading and compiling it on first use; None if there is none."""
+    pack = _packs.get(language)
+    if pack is not None or language not in PACK_LANGUAGES:
+        return pack
+    with _lock:
+        if language not in _packs:
+            with open(os.path.join(PACK_DIR, f"{language}.json"), "r", encoding="utf-8") as f:
+                document = json.load(f)
+            _packs[language] = LexiconPack(
+                language, document["keywords"], document["tokenizer"], document.get("punctuation"),
+            )
+        return _packs[language]
+
+
+def loaded_languages() -> List[str]:
+    """Languages whose packs have been loaded so far."""
+    return sorted(_packs)
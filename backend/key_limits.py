@@ -0,0 +1,57 @@
+"""
+Key Limits - Per-API-key caps on concurrent upstream TTS calls.
+
+Typecast enforces a per-plan concurrency limit (limits.concurrency_limit in
+the subscription response); exceeding it only produces 429s. The chunk
+scheduler starts a key's chunk only while the key is under its limit, so
+requests that fan out (multi-chunk texts, dialogue scripts, batches) share the
+key's limit instead of each assuming it has the whole plan to itself.
+
+The limits live in process memory, so each process enforces only its share:
+the plan limit divided by KEY_LIMIT_PROCESSES (the uvicorn worker count by
+default; set it to the total across nodes when several nodes share keys).
+Every process keeps at least one slot, so a plan limit below the process count
+can still be exceeded.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Dict
+
+# Used until the key's subscription has been fetched
+DEFAULT_KEY_CONCURRENCY = int(os.getenv("DEFAULT_KEY_CONCURRENCY", 3))
+# Processes that split each key's plan limit between them
+KEY_LIMIT_PROCESSES = max(int(os.getenv("KEY_LIMIT_PROCESSES", os.getenv("WEB_CONCURRENCY", 1))), 1)
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable, non-reversible identifier for an API key, safe to keep in memory, logs and cache keys."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def process_share(limit: int, processes: int = KEY_LIMIT_PROCESSES) -> int:
+    """This process's share of a key-wide limit (at least 1)."""
+    return max(int(limit) // processes, 1)
+
+
+class KeyConcurrencyLimiter:
+    """Registry of this process's per-API-key concurrency limits, updated from subscription data."""
+
+    def __init__(self, default_limit: int = DEFAULT_KEY_CONCURRENCY):
+        self.default_limit = process_share(default_limit)
+        self._limits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    key_id = staticmethod(key_fingerprint)
+
+    def limit(self, api_key: str) -> int:
+        return self.limit_for_id(self.key_id(api_key))
+
+    def limit_for_id(self, key_id: str) -> int:
+        return self._limits.get(key_id, self.default_limit)
+
+    def set_limit(self, api_key: str, limit: int) -> None:
+        """Apply this process's share of the key's plan limit."""
+        with self._lock:
+            self._limits[self.key_id(api_key)] = process_share(limit)
@@ -0,0 +1,129 @@
+"""
+Language Resolver - Maps a voice name to its native language.
+
+Built once per metadata catalog load: exact names are a dict lookup, partial
+names (e.g. "Minsang (Happy)" -> "Minsang") are found with an Aho-Corasick
+automaton over the catalog keys, and names outside the catalog fall back to
+precompiled script-range checks. Resolution costs O(len(name)).
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Script heuristics, checked in order
+SCRIPT_LANGUAGES: List[Tuple["re.Pattern", str]] = [
+    (re.compile(r'[가-힣]'), 'ko'),  # Korean (Hangul)
+    # Japanese (Hiragana/Katakana/Kanji). This is broad (includes Chinese Kanji), but acceptable
+    # as specific Chinese names should be in the catalog
+    (re.compile(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FBF]'), 'ja'),
+]
+
+# Provider locale prefixes we recognise when a voice reports its own language
+RAW_LANGUAGE_PREFIXES = ("ko", "ja", "es", "zh", "fr", "de", "it", "ru")
+
+DEFAULT_LANGUAGE = "en"
+
+
+class LanguageResolver:
+    """Resolve voice names to language codes using the catalog's language map."""
+
+    def __init__(self, language_map: Dict[str, str]):
+        self._exact = dict(language_map)
+        self._keys: List[str] = [key for key in language_map if key]
+        self._languages: List[str] = [language_map[key] for key in self._keys]
+        self._build_automaton()
+
+    def _build_automaton(self) -> None:
+        # goto[state] maps a character to the next state; best[state] is the
+        # lowest catalog index of any key ending at this state (or via fail links)
+        goto: List[Dict[str, int]] = [{}]
+        best: List[int] = [-1]
+        for index, key in enumerate(self._keys):
+            state = 0
+            for char in key:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    best.append(-1)
+                state = next_state
+            if best[state] == -1:
+                best[state] = index
+
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                inherited = best[fail[next_state]]
+                if inherited != -1 and (best[next_state] == -1 or inherited < best[next_state]):
+                    best[next_state] = inherited
+
+        self._goto = goto
+        self._fail = fail
+        self._best = best
+
+    def _partial_match(self, name: str) -> Optional[str]:
+        """Return the language of the first catalog key (in catalog order) contained in name."""
+        goto, fail, best = self._goto, self._fail, self._best
+        state = 0
+        found = -1
+        for char in name:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = best[state]
+            if match != -1 and (found == -1 or match < found):
+                found = match
+                if found == 0:
+                    break
+        return self._languages[found] if found != -1 else None
+
+    @staticmethod
+    def resolve_raw(raw_language: Optional[str]) -> Optional[str]:
+        """Map a provider-reported locale such as 'ko-KR' to a language code."""
+        if not raw_language:
+            return None
+        raw_language = raw_language.lower()
+        for prefix in RAW_LANGUAGE_PREFIXES:
+            if raw_language.startswith(prefix):
+                return prefix
+        return None
+
+    def resolve(self, name: str, raw_language: Optional[str] = None) -> str:
+        """
+        Detect the native language of a voice.
+
+        Args:
+            name: Voice name as returned by the provider
+            raw_language: Language/locale reported by the provider, if any
+
+        Returns:
+            ISO 639-1 language code, 'en' when nothing matches
+        """
+        # 1. Raw data from provider
+        language = self.resolve_raw(raw_language)
+        if language:
+            return language
+
+        # 2. Check Map
+        if name in self._exact:
+            return self._exact[name]
+
+        # 3. Check Map Partial Match
+        language = self._partial_match(name)
+        if language:
+            return language
+
+        # 4. Heuristics using script ranges
+        for pattern, language in SCRIPT_LANGUAGES:
+            if pattern.search(name):
+                return language
+
+        return DEFAULT_LANGUAGE
@@ -0,0 +1,116 @@
+"""
+Run a local multi-node cluster for testing the consistent-hash cache.
+
+Starts N backend processes on consecutive ports, each with its own SQLite
+cache file and the same CLUSTER_PEERS list, all pointed at one Typecast API
+(normally loadtest/fake_typecast.py). With --check, renders the same scripts
+through every node in turn and reports how many upstream TTS calls were made;
+with clustering working, that matches a single node.
+
+    python loadtest/fake_typecast.py --port 9000 --latency constant:0.05 &
+    python loadtest/cluster.py --nodes 3 --base-port 8001 --upstream http://127.0.0.1:9000 --check
+"""
+
+import argparse
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPTS = (
+    "Welcome back! Today we are looking at the quarterly numbers.",
+    "I can't believe it worked on the first try. This is amazing!",
+    "Please remember to water the plants on Tuesday. Thank you.",
+    "The train was late again, and I missed the meeting.",
+)
+
+
+def start_nodes(count: int, base_port: int, upstream: str, cache_dir: str) -> List[subprocess.Popen]:
+    urls = [f"http://127.0.0.1:{base_port + i}" for i in range(count)]
+    secret = secrets.token_hex(16)
+    processes = []
+    for i, url in enumerate(urls):
+        env = dict(
+            os.environ,
+            CLUSTER_PEERS=",".join(urls),
+            CLUSTER_SELF=url,
+            CLUSTER_SECRET=secret,
+            VOICEFORGE_CACHE_PATH=os.path.join(cache_dir, f"node{i}.sqlite3"),
+            TYPECAST_API_HOST=upstream,
+            TYPECAST_API_KEY=os.getenv("TYPECAST_API_KEY", "fake-key"),
+        )
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(base_port + i),
+             "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env,
+        ))
+    return processes
+
+
+def wait_ready(urls: List[str], timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    for url in urls:
+        while True:
+            try:
+                requests.get(url, timeout=1).raise_for_status()
+                break
+            except requests.RequestException:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{url} did not start")
+                time.sleep(0.2)
+
+
+def check(urls: List[str], upstream: str, voice_id: str) -> int:
+    before = requests.get(f"{upstream}/_stats", timeout=5).json()["tts_calls"]
+    failures = 0
+    for url in urls:
+        for text in SCRIPTS:
+            response = requests.post(f"{url}/generate", json={"text": text, "voice_id": voice_id}, timeout=60)
+            if response.status_code != 200:
+                failures += 1
+                print(f"{url}: HTTP {response.status_code} {response.text[:200]}")
+    calls = requests.get(f"{upstream}/_stats", timeout=5).json()["tts_calls"] - before
+
+    print(f"{len(urls)} nodes x {len(SCRIPTS)} scripts: {calls} upstream TTS calls "
+          f"(single node: {len(SCRIPTS)}, no sharing: {len(urls) * len(SCRIPTS)})")
+    return 0 if failures == 0 and calls <= len(SCRIPTS) else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--base-port", type=int, default=8001)
+    parser.add_argument("--upstream", default="http://127.0.0.1:9000", help="Typecast API (fake) base URL")
+    parser.add_argument("--voice-id", default="tc_000000000000000000000000")
+    parser.add_argument("--check", action="store_true", help="Run the cache-sharing check, then exit")
+    args = parser.parse_args(argv)
+
+    urls = [f"http://127.0.0.1:{args.base_port + i}" for i in range(args.nodes)]
+    with tempfile.TemporaryDirectory(prefix="voiceforge-cluster-") as cache_dir:
+        processes = start_nodes(args.nodes, args.base_port, args.upstream, cache_dir)
+        try:
+            wait_ready(urls)
+            print("Cluster nodes: " + ", ".join(urls))
+            if args.check:
+                return check(urls, args.upstream, args.voice_id)
+            while all(p.poll() is None for p in processes):
+                time.sleep(1)
+            return 1
+        except KeyboardInterrupt:
+            return 0
+        finally:
+            for p in processes:
+                p.terminate()
+            for p in processes:
+                p.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
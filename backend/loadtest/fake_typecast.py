@@ -0,0 +1,268 @@
+"""
+Local stand-in for the Typecast API, for offline load tests.
+
+Point the backend at it with TYPECAST_API_HOST (read by the Typecast SDK):
+    python loadtest/fake_typecast.py --port 9000 --latency lognormal:0.8,0.4
+    TYPECAST_API_HOST=http://127.0.0.1:9000 TYPECAST_API_KEY=fake uvicorn main:app
+
+Serves /v1/voices, /v1/voices/{id}, /v2/voices/{id}, /v1/users/me/subscription and
+/v1/text-to-speech, plus GET /_stats (call counters) and POST /_reset.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+SAMPLE_RATE = 16000
+SECONDS_PER_CHAR = 0.06  # Roughly natural speaking rate
+
+VOICE_NAMES = ("Minsang", "Jeongseob", "Sujin", "Wade", "Nia", "Walter", "Tessa", "Echo", "Doug", "Janet")
+EMOTIONS = ("normal", "happy", "sad", "angry", "tonedown", "toneup")
+
+
+class LatencyModel:
+    """
+    Upstream latency distribution: "<kind>:<params>" plus a per-character cost.
+
+    constant:S       always S seconds
+    uniform:A,B      uniformly between A and B seconds
+    lognormal:M,SD   lognormal with median M seconds and log-space sigma SD
+    """
+
+    def __init__(self, spec: str, per_char_ms: float = 0.0, seed: Optional[int] = None):
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",")] if params else []
+        self.per_char = per_char_ms / 1000.0
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample(self, chars: int) -> float:
+        with self.lock:
+            if self.kind == "constant":
+                base = self.params[0]
+            elif self.kind == "uniform":
+                base = self.rng.uniform(self.params[0], self.params[1])
+            elif self.kind == "lognormal":
+                base = self.rng.lognormvariate(math.log(self.params[0]), self.params[1])
+            else:
+                raise ValueError(f"Unknown latency distribution: {self.kind}")
+        return base + chars * self.per_char
+
+
+def make_voices(count: int) -> List[Dict]:
+    voices = []
+    for i in range(count):
+        name = VOICE_NAMES[i % len(VOICE_NAMES)]
+        if i >= len(VOICE_NAMES):
+            name = f"{name} {i // len(VOICE_NAMES)}"
+        voices.append({
+            "voice_id": f"tc_{i:024x}",
+            "voice_name": name,
+            "model": "ssfm-v21",
+            "emotions": list(EMOTIONS[: 2 + i % 4]),
+        })
+    return voices
+
+
+def make_wav(seconds: float) -> bytes:
+    data_bytes = int(SAMPLE_RATE * seconds) * 2
+    header = b"RIFF" + struct.pack("<I", 36 + data_bytes) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16)
+    header += b"data" + struct.pack("<I", data_bytes)
+    return header + bytes(data_bytes)
+
+
+def make_mp3(seconds: float) -> bytes:
+    # 128 kbps MPEG-1 Layer III frames at 44.1 kHz are 417 bytes and ~26 ms long
+    frame = b"\xff\xfb\x90\x64" + bytes(413)
+    return frame * max(1, int(seconds / 0.026))
+
+
+class FakeTypecast:
+    """Shared state for the fake server: configuration and call counters."""
+
+    def __init__(self, latency: LatencyModel, voices: int = 50, rate_limit_prob: float = 0.0,
+                 quota_chars: Optional[int] = None, seed: Optional[int] = None):
+        self.latency = latency
+        self.voices = make_voices(voices)
+        self.rate_limit_prob = rate_limit_prob
+        self.quota_chars = quota_chars
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {"tts_calls": 0, "tts_chars": 0, "voices_calls": 0, "voice_detail_calls": 0,
+                          "subscription_calls": 0, "rate_limited": 0, "quota_rejected": 0, "in_flight": 0,
+                          "max_in_flight": 0}
+
+    def count(self, key: str, amount: int = 1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def should_rate_limit(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.rate_limit_prob
+
+    def reserve_chars(self, chars: int) -> bool:
+        """Bill chars against the quota; False if the quota would be exceeded."""
+        with self.lock:
+            if self.quota_chars is not None and self.stats["tts_chars"] + chars > self.quota_chars:
+                self.stats["quota_rejected"] += 1
+                return False
+            self.stats["tts_chars"] += chars
+            return True
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "FakeTypecast/1.0"
+    protocol_version = "HTTP/1.1"
+    fake: FakeTypecast = None  # Set by serve()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers: Dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status: int, payload):
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/v1/voices":
+            self.fake.count("voices_calls")
+            self._json(200, self.fake.voices)
+        elif re.fullmatch(r"/v1/voices/[^/]+", path):
+            self.fake.count("voice_detail_calls")
+            voice_id = path.rsplit("/", 1)[1]
+            voice = next((v for v in self.fake.voices if v["voice_id"] == voice_id), None)
+            if voice is None:
+                self._json(404, {"message": "voice not found"})
+            else:
+                self._json(200, [voice])  # Like the real V1 API, a one-element list
+        elif re.fullmatch(r"/v2/voices/[^/]+", path):
+            self.fake.count("voice_detail_calls")
+            voice_id = path.rsplit("/", 1)[1]
+            index = next((i for i, v in enumerate(self.fake.voices) if v["voice_id"] == voice_id), None)
+            if index is None:
+                self._json(404, {"message": "voice not found"})
+            else:
+                voice = self.fake.voices[index]
+                self._json(200, {
+                    "voice_id": voice_id,
+                    "voice_name": voice["voice_name"],
+                    "models": [{"version": voice["model"], "emotions": voice["emotions"]}],
+                    "gender": ("male", "female")[index % 2],
+                    "age": ("young_adult", "middle_age", "elder", "teenager")[index % 4],
+                    "use_cases": [("Audiobook", "Conversational", "News")[index % 3]],
+                })
+        elif path == "/v1/users/me/subscription":
+            self.fake.count("subscription_calls")
+            quota = self.fake.quota_chars or 10_000_000
+            used = min(self.fake.stats["tts_chars"], quota)
+            self._json(200, {"plan": "plus", "credits": {"plan_credits": quota, "used_credits": used},
+                             "limits": {"concurrency_limit": 5, "custom_voice_slot": 0}})
+        elif path == "/_stats":
+            with self.fake.lock:
+                self._json(200, dict(self.fake.stats))
+        else:
+            self._json(404, {"message": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0]
+
+        if path == "/_reset":
+            self.fake.reset()
+            self._json(200, {"ok": True})
+            return
+        if path != "/v1/text-to-speech":
+            self._json(404, {"message": "not found"})
+            return
+
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            self._json(400, {"message": "invalid JSON"})
+            return
+        text = request.get("text") or ""
+        if not text or not request.get("voice_id"):
+            self._json(422, {"message": "text and voice_id are required"})
+            return
+        if self.fake.should_rate_limit():
+            self.fake.count("rate_limited")
+            self._json(429, {"message": "Too many requests"})
+            return
+        if not self.fake.reserve_chars(len(text)):
+            self._json(402, {"message": "QUOTA_INSUFFICIENT"})
+            return
+
+        self.fake.count("tts_calls")
+        with self.fake.lock:
+            self.fake.stats["in_flight"] += 1
+            self.fake.stats["max_in_flight"] = max(self.fake.stats["max_in_flight"], self.fake.stats["in_flight"])
+        try:
+            time.sleep(self.fake.latency.sample(len(text)))
+        finally:
+            self.fake.count("in_flight", -1)
+
+        seconds = len(text) * SECONDS_PER_CHAR
+        audio_format = (request.get("output") or {}).get("audio_format", "wav")
+        if audio_format == "mp3":
+            self._send(200, make_mp3(seconds), "audio/mpeg", {"X-Audio-Duration": f"{seconds:.3f}"})
+        else:
+            self._send(200, make_wav(seconds), "audio/wav", {"X-Audio-Duration": f"{seconds:.3f}"})
+
+
+def serve(fake: FakeTypecast, host: str = "127.0.0.1", port: int = 9000) -> ThreadingHTTPServer:
+    """Create the HTTP server (call serve_forever() on it, or run it in a thread)."""
+    handler = type("BoundHandler", (Handler,), {"fake": fake})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="constant:S | uniform:A,B | lognormal:M,SD")
+    parser.add_argument("--per-char-ms", type=float, default=0.5, help="Extra latency per character")
+    parser.add_argument("--rate-limit-prob", type=float, default=0.0, help="Probability of a 429 per TTS call")
+    parser.add_argument("--quota-chars", type=int, default=None, help="Reject TTS with 402 past this many characters")
+    parser.add_argument("--voices", type=int, default=50, help="Number of voices served")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    fake = FakeTypecast(
+        LatencyModel(args.latency, args.per_char_ms, args.seed),
+        voices=args.voices, rate_limit_prob=args.rate_limit_prob,
+        quota_chars=args.quota_chars, seed=args.seed,
+    )
+    server = serve(fake, args.host, args.port)
+    print(f"Fake Typecast API on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Open-loop load generator for the backend.
+
+Sends requests at a fixed target rate (independent of response times, so slow
+responses show up as latency rather than lower load) and reports throughput,
+latency percentiles per endpoint and the upstream calls the fake Typecast
+server received.
+
+    python loadtest/load.py --target http://127.0.0.1:8000 --fake http://127.0.0.1:9000 \\
+        --mix generate=1,voices=3,analyze=2 --rps 20 --duration 30
+"""
+
+import argparse
+import concurrent.futures
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import requests
+
+SENTENCES = (
+    "I love how bright the morning feels today!",
+    "Unfortunately the train was late again, and I missed the meeting.",
+    "Wow, I can't wait to see the fireworks tonight!",
+    "The quarterly report is attached for your review.",
+    "Please remember to water the plants on Tuesday.",
+)
+
+
+def make_text(chars: int, rng: random.Random) -> str:
+    parts = []
+    length = 0
+    while length < chars:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)[:chars]
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class LoadGenerator:
+    """Issue a weighted mix of requests at a target rate and collect per-endpoint results."""
+
+    def __init__(self, target: str, api_key: str, mix: Dict[str, float], text_chars: int,
+                 voice_id: Optional[str], max_concurrency: int, seed: int):
+        self.target = target.rstrip("/")
+        self.headers = {"x-api-key": api_key}
+        self.mix = mix
+        self.text_chars = text_chars
+        self.voice_id = voice_id
+        self.rng = random.Random(seed)
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def _session(self) -> requests.Session:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+            session.headers.update(self.headers)
+        return session
+
+    def _request(self, kind: str, scheduled: float, text: str):
+        session = self._session()
+        try:
+            if kind == "generate":
+                response = session.post(f"{self.target}/generate", json={"text": text, "voice_id": self.voice_id})
+            elif kind == "voices":
+                response = session.get(f"{self.target}/voices")
+            elif kind == "analyze":
+                response = session.post(f"{self.target}/analyze-emotion", json={"text": text})
+            else:
+                raise ValueError(f"Unknown request kind: {kind}")
+            status = str(response.status_code)
+        except requests.RequestException as e:
+            status = type(e).__name__
+        # Measured from the scheduled send time, so queueing in the client counts too
+        elapsed = time.perf_counter() - scheduled
+        with self.lock:
+            self.latencies[kind].append(elapsed)
+            self.statuses[kind][status] += 1
+
+    def resolve_voice(self):
+        if self.voice_id or "generate" not in self.mix:
+            return
+        response = requests.get(f"{self.target}/voices", headers=self.headers)
+        response.raise_for_status()
+        self.voice_id = response.json()[0]["voice_id"]
+
+    def run(self, rps: float, duration: float) -> float:
+        kinds = list(self.mix)
+        weights = [self.mix[k] for k in kinds]
+        started = time.perf_counter()
+        futures = []
+        sent = 0
+        while True:
+            scheduled = started + sent / rps
+            if scheduled - started >= duration:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            kind = self.rng.choices(kinds, weights)[0]
+            text = make_text(self.text_chars, self.rng)
+            futures.append(self.pool.submit(self._request, kind, scheduled, text))
+            sent += 1
+        concurrent.futures.wait(futures)
+        self.pool.shutdown()
+        return time.perf_counter() - started
+
+
+def fetch_stats(fake: Optional[str]) -> Dict[str, int]:
+    if not fake:
+        return {}
+    try:
+        return requests.get(f"{fake.rstrip('/')}/_stats", timeout=5).json()
+    except requests.RequestException:
+        return {}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="http://127.0.0.1:8000", help="Backend base URL")
+    parser.add_argument("--fake", default="http://127.0.0.1:9000", help="Fake Typecast URL for upstream stats ('' to skip)")
+    parser.add_argument("--api-key", default="fake-key")
+    parser.add_argument("--mix", default="generate=1,voices=3,analyze=2", help="Weighted request mix")
+    parser.add_argument("--rps", type=float, default=10.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to send for")
+    parser.add_argument("--text-chars", type=int, default=400, help="Characters per /generate or /analyze-emotion text")
+    parser.add_argument("--voice-id", default=None, help="Voice for /generate (default: first from /voices)")
+    parser.add_argument("--max-concurrency", type=int, default=256, help="Client-side cap on open requests")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    generator = LoadGenerator(args.target, args.api_key, parse_mix(args.mix), args.text_chars,
+                              args.voice_id, args.max_concurrency, args.seed)
+    generator.resolve_voice()
+
+    before = fetch_stats(args.fake)
+    elapsed = generator.run(args.rps, args.duration)
+    after = fetch_stats(args.fake)
+
+    report = {"elapsed_s": round(elapsed, 2), "endpoints": {}, "upstream": {}}
+    total = 0
+    for kind, latencies in sorted(generator.latencies.items()):
+        total += len(latencies)
+        report["endpoints"][kind] = {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p90_ms": round(percentile(latencies, 0.90) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "status": dict(generator.statuses[kind]),
+        }
+    report["throughput_rps"] = round(total / elapsed, 2)
+    for key, value in after.items():
+        if key in ("in_flight", "max_in_flight"):
+            report["upstream"][key] = value
+        else:
+            report["upstream"][key] = value - before.get(key, 0)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"Sent {total} requests in {elapsed:.1f}s ({report['throughput_rps']} req/s)")
+    print(f"{'endpoint':<10} {'reqs':>6} {'rps':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9}  status")
+    for kind, row in report["endpoints"].items():
+        print(f"{kind:<10} {row['requests']:>6} {row['throughput_rps']:>7} {row['p50_ms']:>9} "
+              f"{row['p90_ms']:>9} {row['p99_ms']:>9}  {row['status']}")
+    if report["upstream"]:
+        print("upstream: " + ", ".join(f"{k}={v}" for k, v in report["upstream"].items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
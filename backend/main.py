@@ -1,14 +1,43 @@
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
-from typecast_service import TypecastService
-from emotion_analyzer import analyze_emotion, analyze_sentences
+from typecast_service import VOICES_CACHE_TTL, TypecastService
+from emotion_analyzer import analyze_emotion, analyze_sentences, emotion_analyzer
+from metadata_catalog import MetadataCatalog
+from voice_enrichment import enrich_voices
+from voice_preview import VoicePreviews
+from voice_details import VoiceDetailEnricher
+from voices_payload import VoicesPayloadCache, build_payload
+from render_revisions import RenderStore, plan_revision
+from shared_cache import SharedCache
+from cluster_cache import PEER_MAX_VALUE_BYTES, ClusterCache, cache_from_env
+from text_segmenter import IncrementalSegmenter
+from cancellation import GENERATE_TIMEOUT, CancelToken, batch_timeout_limit, request_token
+from metrics import InFlightMiddleware, record_audio_bytes, record_cache, render_metrics, time_stage
+from structured_logging import RequestIdMiddleware, configure_logging, log_event
+import asyncio
 import base64
+import codecs
+import concurrent.futures
+import contextvars
+import hashlib
+import hmac
+import io
+import json
+import logging
+import uuid
+import zipfile
+from contextlib import contextmanager
+import anyio
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="VoiceForge AI Backend")
 
@@ -24,8 +53,45 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(InFlightMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
+# Shared by every worker process on this host (see DEPLOY.md, "Running multiple workers"),
+# and sharded across nodes when CLUSTER_PEERS is set
+shared_cache = cache_from_env(SharedCache())
+service = TypecastService(cache=shared_cache)
+
+previews = VoicePreviews(service, shared_cache)
+voice_details = VoiceDetailEnricher(service, shared_cache)
+# Serialized, pre-compressed /voices responses per voice list, catalog and details version
+voices_payloads = VoicesPayloadCache(ttl=VOICES_CACHE_TTL)
+# Chunk plans of past renders, for /generate/revise
+renders = RenderStore(shared_cache)
+
+# Browsers may reuse a preview for a week, then revalidate with its ETag
+PREVIEW_CACHE_CONTROL = "public, max-age=604800"
+
+@app.on_event("startup")
+def start_preview_prerender():
+    previews.start_prerender(os.getenv("TYPECAST_API_KEY"))
+
+# Emotion analysis is cheap for short texts; only cache long ones
+EMOTION_CACHE_MIN_CHARS = 1000
+EMOTION_CACHE_TTL = 24 * 3600
 
-service = TypecastService()
+def cached_emotion_analysis(text: str, sentences: bool = False):
+    """Run analyze_emotion (or analyze_sentences), sharing long-text results across workers."""
+    analyze = analyze_sentences if sentences else analyze_emotion
+    if len(text) < EMOTION_CACHE_MIN_CHARS:
+        return analyze(text)
+
+    namespace = "emotion_sentences" if sentences else "emotion"
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    result = shared_cache.get_json(namespace, key)
+    if result is None:
+        result = analyze(text)
+        shared_cache.set_json(namespace, key, result, ttl=EMOTION_CACHE_TTL)
+    return result
 
 class GenerateRequest(BaseModel):
     text: str
@@ -41,6 +107,34 @@ class GenerateRequest(BaseModel):
     volume: Optional[int] = 100  # 0-200
     audio_format: Optional[str] = "wav"  # wav or mp3
     seed: Optional[int] = None  # For reproducibility
+    timeout: Optional[float] = None  # Seconds before the render is abandoned (capped by GENERATE_TIMEOUT)
+
+class BatchRequest(BaseModel):
+    items: List[GenerateRequest]  # Item timeouts are ignored; the batch has one deadline
+    output: Optional[str] = "zip"  # "zip" or "multipart"
+    timeout: Optional[float] = None
+
+class ScriptSegment(BaseModel):
+    text: str
+    voice_id: str
+    emotion_preset: Optional[str] = "normal"
+    emotion_intensity: Optional[float] = 1.0
+    speed: Optional[float] = 1.0
+    pitch: Optional[int] = 0
+    volume: Optional[int] = 100
+    seed: Optional[int] = None
+
+class ScriptRequest(BaseModel):
+    segments: List[ScriptSegment]
+    model: Optional[str] = "ssfm-v21"
+    audio_format: Optional[str] = "wav"
+    pause_ms: Optional[int] = 300  # Silence between segments (WAV only)
+    timeout: Optional[float] = None
+
+class ReviseRequest(BaseModel):
+    render_id: str  # From a previous /generate or /generate/revise response
+    text: str       # The revised script
+    timeout: Optional[float] = None
 
 class EmotionAnalyzeRequest(BaseModel):
     text: str
@@ -60,82 +154,73 @@ class EmotionAnalyzeResponse(BaseModel):
 def read_root():
     return {"message": "VoiceForge AI Backend is running"}
 
-import json
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics for stage timings, upstream calls, caches and in-flight requests."""
+    data, content_type = render_metrics()
+    return Response(content=data, media_type=content_type)
 
-import json
+def _local_cache_for_peer(secret: Optional[str]) -> SharedCache:
+    """Return the local store behind /internal/cache, rejecting non-peer callers."""
+    if not isinstance(shared_cache, ClusterCache):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(secret or "", shared_cache.secret):
+        raise HTTPException(status_code=403, detail="Invalid cluster secret")
+    return shared_cache.local
+
+@app.get("/internal/cache/{namespace}/{key}")
+def peer_cache_get(namespace: str, key: str, x_cluster_secret: Optional[str] = Header(None)):
+    """Serve a cache entry owned by this node to a cluster peer."""
+    value = _local_cache_for_peer(x_cluster_secret).get(namespace, key)
+    if value is None:
+        raise HTTPException(status_code=404, detail="Not cached")
+    return Response(content=value, media_type="application/octet-stream")
+
+@app.put("/internal/cache/{namespace}/{key}", status_code=204)
+async def peer_cache_set(namespace: str, key: str, request: Request,
+                         ttl: Optional[float] = None, x_cluster_secret: Optional[str] = Header(None)):
+    """Store a cache entry owned by this node on behalf of a cluster peer."""
+    local = _local_cache_for_peer(x_cluster_secret)
+    too_large = HTTPException(status_code=413, detail="Cache entry too large")
+    if int(request.headers.get("content-length") or 0) > PEER_MAX_VALUE_BYTES:
+        raise too_large
+    value = bytearray()
+    async for chunk in request.stream():
+        value += chunk
+        if len(value) > PEER_MAX_VALUE_BYTES:
+            raise too_large
+    value = bytes(value)
+    await run_in_threadpool(local.set, namespace, key, value, ttl)
+    return Response(status_code=204)
+
+@app.delete("/internal/cache/{namespace}/{key}", status_code=204)
+def peer_cache_delete(namespace: str, key: str, x_cluster_secret: Optional[str] = Header(None)):
+    _local_cache_for_peer(x_cluster_secret).delete(namespace, key)
+    return Response(status_code=204)
 
-# Load Gender Map from external file
-GENDER_MAP = {}
-try:
-    with open("gender_data.json", "r", encoding="utf-8") as f:
-        GENDER_MAP = json.load(f)
-    print(f"Loaded {len(GENDER_MAP)} gender mappings.")
-except Exception as e:
-    print(f"Warning: Could not load gender_data.json: {e}")
-
-# Load Language Map from external file
-LANGUAGE_MAP = {}
-try:
-    with open("language_data.json", "r", encoding="utf-8") as f:
-        LANGUAGE_MAP = json.load(f)
-    print(f"Loaded {len(LANGUAGE_MAP)} language mappings.")
-except Exception as e:
-    print(f"Warning: Could not load language_data.json: {e}")
-
-# Load Style Map from external file
-STYLE_MAP = {}
-try:
-    with open("style_data.json", "r", encoding="utf-8") as f:
-        STYLE_MAP = json.load(f)
-    print(f"Loaded {len(STYLE_MAP)} style mappings.")  # Updated with 18 categories
-except Exception as e:
-    print(f"Warning: Could not load style_data.json: {e}")
-
-# Load Age Map from external file
-AGE_MAP = {}
-try:
-    with open("age_data.json", "r", encoding="utf-8") as f:
-        AGE_MAP = json.load(f)
-    print(f"Loaded {len(AGE_MAP)} age mappings.")
-except Exception as e:
-    print(f"Warning: Could not load age_data.json: {e}")
-
-# Load Avatar Map from external file
-AVATAR_MAP = {}
-try:
-    with open("avatar_data.json", "r", encoding="utf-8") as f:
-        AVATAR_MAP = json.load(f)
-    print(f"Loaded {len(AVATAR_MAP)} avatar mappings.")
-except Exception as e:
-    print(f"Warning: Could not load avatar_data.json: {e}")
+def tts_error_status(error_msg: str) -> int:
+    """HTTP status for a failed synthesis, based on the upstream error message."""
+    if "QUOTA_INSUFFICIENT" in error_msg or "Payment required" in error_msg:
+        return 402 # Payment Required
+    if "Validation error" in error_msg:
+        return 400 # Bad Request
+    if "DEADLINE_EXCEEDED" in error_msg:
+        return 504 # Gateway Timeout
+    if "CANCELLED" in error_msg:
+        return 499 # Client Closed Request (nobody is listening anyway)
+    return 500
+
+# Voice metadata maps, compiled into one catalog and hot-reloaded on change
+catalog = MetadataCatalog()
 
 def detect_language(name: str) -> str:
     """Detect language from name using map and heuristics."""
-    # 1. Check Map
-    if name in LANGUAGE_MAP:
-        return LANGUAGE_MAP[name]
-    
-    # 2. Check Map Partial Match (e.g. "Minsang (Happy)" -> matches "Minsang")
-    for key, lang in LANGUAGE_MAP.items():
-        if key in name:
-            return lang
-
-    # 3. Heuristics using Regex
-    import re
-    # Korean (Hangul)
-    if re.search(r'[가-힣]', name):
-        return 'ko'
-    # Japanese (Hiragana/Katakana/Kanji - simple check)
-    if re.search(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FBF]', name):
-        # This is broad (includes Chinese Kanji), but acceptable for now as specific Chinese names should be in map
-        return 'ja' 
-        
-    # Default to English
-    return 'en'
+    return catalog.get().resolver.resolve(name)
 
-@app.get("/voices")
-def get_voices(x_api_key: Optional[str] = Header(None), model: Optional[str] = None):
-    print(f"DEBUG: /voices endpoint hit. API Key provided: {'Yes' if x_api_key else 'No'}")
+@app.get("/voices", response_class=JSONResponse)
+def get_voices(x_api_key: Optional[str] = Header(None), model: Optional[str] = None,
+               accept_encoding: Optional[str] = Header(None), if_none_match: Optional[str] = Header(None)):
+    log_event(logger, "voices.request", logging.DEBUG, api_key_provided=bool(x_api_key), model=model)
 
     if not x_api_key:
          # Fallback to env var if not header provided (backward comp), or raise error
@@ -145,114 +230,86 @@ def get_voices(x_api_key: Optional[str] = Header(None), model: Optional[str] = N
         raise HTTPException(status_code=401, detail="API Key is required")
 
     try:
-        voices = service.get_voices(api_key=x_api_key, model=model)
-        
-        results = []
-        for v in voices:
-            name = v.get("name", v.get("voice_name", "Unknown"))
-            voice_id = v.get("voice_id")
-            
-            # Determine Gender
-            gender = "Unknown"
-            if name in GENDER_MAP:
-                gender = GENDER_MAP[name]
-            elif "(M)" in name or " Male" in name:
-                gender = "Male"
-            elif "(F)" in name or " Female" in name:
-                gender = "Female"
-            
-            # Determine NATIVE Language
-            native_language = "en" # Default
-            
-            # 1. Check raw data from provider (if present in future)
-            raw_lang = v.get("language") or v.get("lang") or v.get("locale")
-            if raw_lang:
-                raw_lang = raw_lang.lower()
-                if raw_lang.startswith("ko"): native_language = "ko"
-                elif raw_lang.startswith("ja"): native_language = "ja"
-                elif raw_lang.startswith("es"): native_language = "es"
-                elif raw_lang.startswith("zh"): native_language = "zh"
-                elif raw_lang.startswith("fr"): native_language = "fr"
-                elif raw_lang.startswith("de"): native_language = "de"
-                elif raw_lang.startswith("it"): native_language = "it"
-                elif raw_lang.startswith("ru"): native_language = "ru"
-            else:
-                # 2. Check Map
-                if name in LANGUAGE_MAP:
-                    native_language = LANGUAGE_MAP[name]
-                else:
-                    # 3. Heuristics using Regex
-                    import re
-                    # Korean (Hangul)
-                    if re.search(r'[가-힣]', name):
-                        native_language = 'ko'
-                    # Japanese (Hiragana/Katakana/Kanji)
-                    elif re.search(r'[\u3040-\u309F\u30A0-\u30FF\u4E00-\u9FBF]', name):
-                         native_language = 'ja'
-            
-            # Construct Supported Languages List
-            # ssfm-v21 model is MULTILINGUAL - ALL voices support 27 languages per official docs
-            # https://typecast.ai/docs/models
-            # The native_language indicates the voice's origin/accent, but can speak all languages
-            
-            # Full list of 27 supported languages from Typecast ssfm-v21 documentation
-            SSFM_V21_LANGUAGES = [
-                "en", "ko", "zh", "es", "ar", "pt", "ru", "ja", "de", "fr",
-                "id", "it", "ms", "pl", "nl", "uk", "el", "ta", "sv", "cs",
-                "da", "fi", "tl", "sk", "bg", "hr", "ro"
-            ]
-            
-            # Put native language first, then all other supported languages
-            supported_languages = [native_language]
-            for lang in SSFM_V21_LANGUAGES:
-                if lang != native_language:
-                    supported_languages.append(lang)
-
-            # Get Style from map
-            styles = STYLE_MAP.get(name, ["Conversational"])  # Default to Conversational
-            
-            # Get Age Group from map (overrides API if available)
-            age_group = AGE_MAP.get(name, v.get("age_range") or "Young Adult")
-
-            # Construct Avatar URL
-            image_url = v.get("image_url")
-            if not image_url:
-                # 1. Try avatar map first (scraped from Typecast website)
-                if name in AVATAR_MAP:
-                    image_url = AVATAR_MAP[name]
-                else:
-                    # 2. Fallback to /All/{name}.webp pattern
-                    safe_name = name.lower().replace(" ", "")
-                    if "(" in safe_name:
-                        safe_name = safe_name.split("(")[0]
-                    image_url = f"https://static2.typecast.ai/c/All/{safe_name}.webp"
-
-            results.append({
-                "voice_id": voice_id,
-                "name": name,
-                "emotions": v.get("emotions", []),
-                "model": v.get("model"),
-                "gender": gender,
-                "languages": supported_languages, 
-                "native_language": native_language,
-                "age_range": age_group,
-                "styles": styles,
-                "image_url": image_url
-            })
-            
-        return results
+        meta = catalog.get()
+        key = voices_payloads.key(x_api_key, model, meta.version, voice_details.version)
+        payload = voices_payloads.get(key)
+        record_cache("voices_payload", payload is not None)
+        if payload is None:
+            voices = service.get_voices(api_key=x_api_key, model=model)
+            payload = voices_payloads.put(key, build_payload(enrich_voices(voices, meta, voice_details.snapshot())))
+
+        # Fetch missing per-voice details in the background; this response uses what is cached
+        voice_details.schedule(os.getenv("TYPECAST_API_KEY") or x_api_key, payload.voice_ids)
+        return payload.response(accept_encoding, if_none_match)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/generate")
-def generate_speech(request: GenerateRequest, x_api_key: Optional[str] = Header(None)):
-    if not x_api_key:
-         x_api_key = os.getenv("TYPECAST_API_KEY")
-    
+@app.get("/voices/{voice_id}/preview")
+def get_voice_preview(voice_id: str, model: Optional[str] = None, language: Optional[str] = None,
+                      x_api_key: Optional[str] = Header(None), if_none_match: Optional[str] = Header(None)):
+    """Standard preview phrase for a voice as WAV. Rendered once, then served from cache."""
+    x_api_key = x_api_key or os.getenv("TYPECAST_API_KEY")
     if not x_api_key:
         raise HTTPException(status_code=401, detail="API Key is required")
-    
+
+    # Only voices in the (cached) voice list are counted, rendered or pre-rendered
+    try:
+        voices = service.get_voices(api_key=x_api_key)
+    except Exception as e:
+        raise HTTPException(status_code=tts_error_status(str(e)), detail=str(e))
+    key = previews.resolve(voices, voice_id, model, language)
+    if key is None:
+        raise HTTPException(status_code=404, detail="Voice not found")
+    audio = previews.cached(key)
+
+    if audio is None:
+        try:
+            audio = previews.render(key, x_api_key)
+        except Exception as e:
+            raise HTTPException(status_code=tts_error_status(str(e)), detail=str(e))
+
+    headers = {"ETag": previews.etag(audio), "Cache-Control": PREVIEW_CACHE_CONTROL}
+    if if_none_match == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    record_audio_bytes("wav", len(audio))
+    return Response(content=audio, media_type="audio/wav", headers=headers)
+
+# How often a render checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+_disconnect_watchers = set()  # Keeps watcher tasks referenced while they run
+
+@contextmanager
+def render_token(http_request: Request, timeout: Optional[float], limit: float = GENERATE_TIMEOUT):
+    """
+    Cancellation token for a render in a sync endpoint: it expires at the
+    request's deadline (capped at limit) and is cancelled as soon as the
+    client disconnects.
+    """
+    token = request_token(timeout, limit)
+
+    async def watch():
+        while not token.finished and not token.cancelled:
+            if await http_request.is_disconnected():
+                token.cancel("CANCELLED: client disconnected")
+                log_event(logger, "tts.client_disconnected", path=http_request.url.path)
+                return
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+    async def start_watch():
+        task = asyncio.create_task(watch())
+        _disconnect_watchers.add(task)
+        task.add_done_callback(_disconnect_watchers.discard)
+
+    # Sync endpoints run in a worker thread; the watcher runs on the event loop
+    anyio.from_thread.run(start_watch)
+    try:
+        yield token
+    finally:
+        token.finished = True
+
+def resolve_emotion(request: GenerateRequest):
+    """Return (emotion preset to send upstream, detected emotion info for the response or None)."""
     # Determine emotion to use
     emotion_to_use = request.emotion_preset
     detected_emotion_info = None
@@ -260,39 +317,65 @@ def generate_speech(request: GenerateRequest, x_api_key: Optional[str] = Header(
     # Smart Emotion Detection
     if request.auto_emotion:
         # 1. Analyze locally for UI Feedback ONLY
-        emotion_result = analyze_emotion(request.text)
+        with time_stage("emotion_analysis"):
+            emotion_result = cached_emotion_analysis(request.text)
         detected_emotion_info = {
             "detected_emotion": emotion_result["detected_emotion"],
             "confidence": emotion_result["confidence"]
         }
-        print(f"[Smart Emotion] Local Detection: {emotion_result['detected_emotion']} (confidence: {emotion_result['confidence']:.2f})")
+        log_event(
+            logger, "smart_emotion.detected",
+            emotion=emotion_result["detected_emotion"], confidence=emotion_result["confidence"],
+        )
         
         # 2. Use Native Typecast Smart Emotion by passing None
         # This allows Typecast to automatically select the best emotion (or default to normal if unsupported)
         emotion_to_use = None 
-        print(f"[Smart Emotion] delegating to Typecast Native Engine (emotion_preset=None)")
+
+    return emotion_to_use, detected_emotion_info
+
+def render_settings(request: GenerateRequest, emotion_to_use: Optional[str]) -> dict:
+    """Keyword arguments for service.generate_speech (besides api_key, text and chunks)."""
+    return {
+        "voice_id": request.voice_id,
+        "emotion_preset": emotion_to_use,
+        "emotion_intensity": request.emotion_intensity,
+        "speed": request.speed,
+        "pitch": request.pitch,
+        "tempo": request.tempo,
+        "model": request.model or "ssfm-v21",
+        "volume": request.volume,
+        "audio_format": request.audio_format,
+        "seed": request.seed,
+    }
+
+@app.post("/generate")
+def generate_speech(request: GenerateRequest, http_request: Request, x_api_key: Optional[str] = Header(None)):
+    if not x_api_key:
+         x_api_key = os.getenv("TYPECAST_API_KEY")
+    
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API Key is required")
+    
+    emotion_to_use, detected_emotion_info = resolve_emotion(request)
+    settings = render_settings(request, emotion_to_use)
 
     try:
-        audio_data, duration = service.generate_speech(
-            api_key=x_api_key,
-            text=request.text,
-            voice_id=request.voice_id,
-            emotion_preset=emotion_to_use,
-            emotion_intensity=request.emotion_intensity,
-            speed=request.speed,
-            pitch=request.pitch,
-            tempo=request.tempo,
-            model=request.model or "ssfm-v21",
-            volume=request.volume,
-            audio_format=request.audio_format,
-            seed=request.seed
-        )
-        audio_base64 = base64.b64encode(audio_data).decode("utf-8")
+        with time_stage("split_text"):
+            chunks = service.plan_chunks(request.text)
+        with render_token(http_request, request.timeout) as cancel:
+            audio_data, duration = service.generate_speech(
+                api_key=x_api_key, text=request.text, chunks=chunks, cancel=cancel, **settings
+            )
+        with time_stage("base64_encode"):
+            audio_base64 = base64.b64encode(audio_data).decode("utf-8")
+        record_audio_bytes(request.audio_format, len(audio_data))
         
         response_data = {
             "audio_base64": audio_base64,
             "duration": duration,
-            "format": "wav"
+            "format": "wav",
+            "render_id": renders.save(settings, chunks),
         }
         
         # Include detected emotion info if smart emotion was used
@@ -302,14 +385,336 @@ def generate_speech(request: GenerateRequest, x_api_key: Optional[str] = Header(
         return response_data
     except Exception as e:
         # Check if it's a quota/payment issue
-        error_msg = str(e)
-        status_code = 500
-        if "QUOTA_INSUFFICIENT" in error_msg or "Payment required" in error_msg:
-             status_code = 402 # Payment Required
-        elif "Validation error" in error_msg:
-             status_code = 400 # Bad Request
-             
-        raise HTTPException(status_code=status_code, detail=error_msg)
+        raise HTTPException(status_code=tts_error_status(str(e)), detail=str(e))
+
+
+@app.post("/generate/plan")
+def plan_speech(request: GenerateRequest, x_api_key: Optional[str] = Header(None)):
+    """
+    Preview a /generate request without rendering it.
+
+    Returns the chunk plan /generate would use, which chunks are already
+    cached, the billable characters, and the predicted audio duration and
+    wall-clock render time. Predictions come from speaking rates and upstream
+    latencies learned from recent renders.
+    """
+    if not x_api_key:
+         x_api_key = os.getenv("TYPECAST_API_KEY")
+    
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API Key is required")
+
+    emotion_to_use, detected_emotion_info = resolve_emotion(request)
+    try:
+        with time_stage("split_text"):
+            chunks = service.plan_chunks(request.text)
+        plan = service.plan_render(x_api_key, chunks, **render_settings(request, emotion_to_use))
+    except Exception as e:
+        raise HTTPException(status_code=tts_error_status(str(e)), detail=str(e))
+
+    if detected_emotion_info:
+        plan["detected_emotion"] = detected_emotion_info
+    return plan
+
+
+# Limits for /generate/batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 500))
+BATCH_COORDINATORS = 32  # Items waiting on their chunks at once; the chunks share the scheduler
+
+def render_batch_item(index: int, item: GenerateRequest, api_key: str, cancel: CancelToken):
+    """Render one batch item. Returns (status entry, audio bytes or None); never raises."""
+    fmt = "mp3" if (item.audio_format or "wav").lower() == "mp3" else "wav"
+    try:
+        emotion_to_use, detected_emotion_info = resolve_emotion(item)
+        audio_data, duration = service.generate_speech(
+            api_key=api_key, text=item.text, voice_id=item.voice_id, emotion_preset=emotion_to_use,
+            emotion_intensity=item.emotion_intensity, speed=item.speed, pitch=item.pitch, tempo=item.tempo,
+            model=item.model or "ssfm-v21", volume=item.volume, audio_format=fmt, seed=item.seed,
+            priority="bulk", cancel=cancel,
+        )
+    except Exception as e:
+        return {"index": index, "status": "error", "status_code": tts_error_status(str(e)), "detail": str(e)}, None
+
+    record_audio_bytes(fmt, len(audio_data))
+    entry = {"index": index, "status": "ok", "file": f"item-{index:04d}.{fmt}", "duration": duration}
+    if detected_emotion_info:
+        entry["detected_emotion"] = detected_emotion_info
+    return entry, audio_data
+
+@app.post("/generate/batch")
+def generate_batch(request: BatchRequest, http_request: Request, x_api_key: Optional[str] = Header(None)):
+    """
+    Render many independent texts in one request.
+
+    All items' chunks run on the shared chunk scheduler at bulk priority, so a
+    large batch does not delay interactive requests. A failed item is
+    reported in the manifest and does not fail the batch. The response is a
+    zip (manifest.json + one audio file per successful item) or, with
+    output="multipart", a multipart/mixed body whose first part is the
+    manifest.
+    """
+    if not x_api_key:
+         x_api_key = os.getenv("TYPECAST_API_KEY")
+    
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API Key is required")
+
+    if not request.items:
+        raise HTTPException(status_code=400, detail="At least one item is required")
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    if request.output not in ("zip", "multipart"):
+        raise HTTPException(status_code=400, detail="output must be 'zip' or 'multipart'")
+
+    with render_token(http_request, request.timeout, batch_timeout_limit(len(request.items))) as cancel, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=min(len(request.items), BATCH_COORDINATORS)) as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, render_batch_item, i, item, x_api_key, cancel)
+            for i, item in enumerate(request.items)
+        ]
+        results = [future.result() for future in futures]
+
+    manifest = {
+        "items": [entry for entry, _ in results],
+        "succeeded": sum(1 for entry, _ in results if entry["status"] == "ok"),
+        "failed": sum(1 for entry, _ in results if entry["status"] != "ok"),
+    }
+    log_event(logger, "tts.batch", items=len(results), succeeded=manifest["succeeded"], failed=manifest["failed"])
+    headers = {"X-Batch-Succeeded": str(manifest["succeeded"]), "X-Batch-Failed": str(manifest["failed"])}
+    manifest_json = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+
+    if request.output == "zip":
+        buffer = io.BytesIO()
+        # Audio is already compressed (mp3) or barely compressible (PCM), so store it
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+            archive.writestr("manifest.json", manifest_json)
+            for entry, audio_data in results:
+                if audio_data is not None:
+                    archive.writestr(entry["file"], audio_data)
+        headers["Content-Disposition"] = 'attachment; filename="batch.zip"'
+        return Response(content=buffer.getvalue(), media_type="application/zip", headers=headers)
+
+    boundary = uuid.uuid4().hex
+    parts = [
+        f"--{boundary}\r\nContent-Type: application/json\r\n"
+        f'Content-Disposition: inline; name="manifest"\r\n\r\n'.encode("latin-1") + manifest_json
+    ]
+    for entry, audio_data in results:
+        if audio_data is not None:
+            media_type = "audio/mpeg" if entry["file"].endswith(".mp3") else "audio/wav"
+            parts.append(
+                f"--{boundary}\r\nContent-Type: {media_type}\r\n"
+                f'Content-Disposition: attachment; name="item-{entry["index"]}"; filename="{entry["file"]}"\r\n\r\n'
+                .encode("latin-1") + audio_data
+            )
+    body = b"\r\n".join(parts) + f"\r\n--{boundary}--\r\n".encode("latin-1")
+    return Response(content=body, media_type=f"multipart/mixed; boundary={boundary}", headers=headers)
+
+@app.post("/generate/script")
+def generate_script(request: ScriptRequest, http_request: Request, x_api_key: Optional[str] = Header(None)):
+    """
+    Render a multi-voice dialogue in one request.
+
+    Returns the combined audio plus a "segments" timing manifest with each
+    line's start and end time in seconds.
+    """
+    if not x_api_key:
+         x_api_key = os.getenv("TYPECAST_API_KEY")
+    
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API Key is required")
+
+    if not request.segments:
+        raise HTTPException(status_code=400, detail="At least one segment is required")
+
+    try:
+        with render_token(http_request, request.timeout) as cancel:
+            audio_data, duration, timings = service.generate_script(
+                api_key=x_api_key,
+                segments=[segment.model_dump() for segment in request.segments],
+                model=request.model or "ssfm-v21",
+                audio_format=request.audio_format,
+                pause=max(request.pause_ms or 0, 0) / 1000,
+                cancel=cancel,
+            )
+        with time_stage("base64_encode"):
+            audio_base64 = base64.b64encode(audio_data).decode("utf-8")
+        record_audio_bytes(request.audio_format, len(audio_data))
+
+        return {
+            "audio_base64": audio_base64,
+            "duration": duration,
+            "format": request.audio_format,
+            "segments": timings,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=tts_error_status(str(e)), detail=str(e))
+
+@app.post("/generate/revise")
+def revise_speech(request: ReviseRequest, http_request: Request, x_api_key: Optional[str] = Header(None)):
+    """
+    Re-render a revised script with the settings of a previous render.
+
+    Sentences are diffed against the previous render's chunk plan; chunks
+    whose sentences are all unchanged are reused from the audio cache and
+    only the changed runs are synthesized.
+    """
+    if not x_api_key:
+         x_api_key = os.getenv("TYPECAST_API_KEY")
+    
+    if not x_api_key:
+        raise HTTPException(status_code=401, detail="API Key is required")
+
+    previous = renders.load(request.render_id)
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Render not found or expired")
+    settings = previous["settings"]
+
+    try:
+        with time_stage("split_text"):
+            plan = plan_revision(previous["chunks"], request.text, service.plan_chunks)
+        log_event(
+            logger, "tts.revise", render_id=request.render_id, reused_chunks=plan.reused_chunks,
+            new_chunks=plan.new_chunks, new_characters=plan.new_characters,
+        )
+        with render_token(http_request, request.timeout) as cancel:
+            audio_data, duration = service.generate_speech(
+                api_key=x_api_key, text=request.text, chunks=plan.chunks, cancel=cancel, **settings
+            )
+        with time_stage("base64_encode"):
+            audio_base64 = base64.b64encode(audio_data).decode("utf-8")
+        record_audio_bytes(settings["audio_format"], len(audio_data))
+
+        return {
+            "audio_base64": audio_base64,
+            "duration": duration,
+            "format": "wav",
+            "render_id": renders.save(settings, plan.chunks),
+            "reused_chunks": plan.reused_chunks,
+            "new_chunks": plan.new_chunks,
+            "new_characters": plan.new_characters,
+        }
+    except Exception as e:
+        raise HTTPException(status_code=tts_error_status(str(e)), detail=str(e))
+
+
+class StreamStartMessage(BaseModel):
+    """First message of a /ws/generate session. Audio is always WAV."""
+    voice_id: str
+    api_key: Optional[str] = None  # Browsers cannot set headers on WebSockets
+    emotion_preset: Optional[str] = "normal"
+    emotion_intensity: Optional[float] = 1.0
+    speed: Optional[float] = 1.0
+    pitch: Optional[int] = 0
+    model: Optional[str] = "ssfm-v21"
+    volume: Optional[int] = 100
+    seed: Optional[int] = None
+    language: Optional[str] = None
+    min_chars: Optional[int] = 0  # Join sentences shorter than this to the next one
+
+@app.websocket("/ws/generate")
+async def generate_speech_stream(websocket: WebSocket):
+    """
+    Incremental TTS for text that arrives in pieces.
+
+    Client -> server (JSON): {"type": "start", ...StreamStartMessage}, then any
+    number of {"type": "text", "text": "..."}, then {"type": "end"}.
+
+    Server -> client: for each sentence, in order, a JSON
+    {"type": "audio", "index", "text", "duration", "bytes"} message followed by
+    a binary message with that sentence's WAV; then {"type": "done", ...}.
+    On failure: {"type": "error", "status", "detail"} and the socket closes.
+    """
+    await websocket.accept()
+    try:
+        start = StreamStartMessage(**{k: v for k, v in (await websocket.receive_json()).items() if k != "type"})
+    except Exception as e:
+        await websocket.send_json({"type": "error", "status": 400, "detail": str(e)})
+        await websocket.close(code=1003)
+        return
+
+    api_key = start.api_key or websocket.headers.get("x-api-key") or os.getenv("TYPECAST_API_KEY")
+    if not api_key:
+        await websocket.send_json({"type": "error", "status": 401, "detail": "API Key is required"})
+        await websocket.close(code=1008)
+        return
+
+    segmenter = IncrementalSegmenter(start.language, service.MAX_CHUNK_CHARS, start.min_chars or 0)
+    # Sentences are synthesized as soon as they are complete, at most MAX_WORKERS at a time
+    slots = asyncio.Semaphore(service.MAX_WORKERS)
+    pending: asyncio.Queue = asyncio.Queue()
+    # Stops sentences still rendering once the session ends or a sentence fails
+    cancel = CancelToken()
+
+    async def synthesize(text: str):
+        async with slots:
+            return await run_in_threadpool(
+                service.generate_speech,
+                api_key=api_key, text=text, voice_id=start.voice_id, emotion_preset=start.emotion_preset,
+                emotion_intensity=start.emotion_intensity, speed=start.speed, pitch=start.pitch,
+                model=start.model or "ssfm-v21", volume=start.volume, audio_format="wav", seed=start.seed,
+                priority="interactive", cancel=cancel,
+            )
+
+    async def send_in_order():
+        index, total_duration = 0, 0.0
+        while True:
+            item = await pending.get()
+            if item is None:
+                await websocket.send_json({"type": "done", "segments": index, "duration": total_duration})
+                return
+            text, task = item
+            audio, duration = await task
+            total_duration += duration
+            record_audio_bytes("wav", len(audio))
+            await websocket.send_json(
+                {"type": "audio", "index": index, "text": text, "duration": duration, "bytes": len(audio)}
+            )
+            await websocket.send_bytes(audio)
+            index += 1
+
+    sender = asyncio.create_task(send_in_order())
+    tasks = []
+
+    def submit(sentences):
+        for text in sentences:
+            task = asyncio.create_task(synthesize(text))
+            tasks.append(task)
+            pending.put_nowait((text, task))
+
+    try:
+        while not sender.done():
+            receive = asyncio.create_task(websocket.receive_json())
+            await asyncio.wait({receive, sender}, return_when=asyncio.FIRST_COMPLETED)
+            if not receive.done():
+                # The sender stopped (a sentence failed) while waiting for input
+                receive.cancel()
+                break
+            message = receive.result()
+            if message.get("type") == "text":
+                submit(segmenter.feed(message.get("text") or ""))
+            elif message.get("type") == "end":
+                submit(segmenter.flush())
+                pending.put_nowait(None)
+                break
+        await sender
+    except WebSocketDisconnect:
+        log_event(logger, "tts_stream.disconnected", sentences=len(tasks))
+    except Exception as e:
+        log_event(logger, "tts_stream.failed", logging.ERROR, error=str(e))
+        try:
+            await websocket.send_json({"type": "error", "status": tts_error_status(str(e)), "detail": str(e)})
+        except Exception:
+            pass
+    finally:
+        cancel.cancel("CANCELLED: stream closed")
+        sender.cancel()
+        for task in tasks:
+            task.cancel()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
 
 
 @app.post("/analyze-emotion", response_model=EmotionAnalyzeResponse)
@@ -319,11 +724,12 @@ def analyze_text_emotion(request: EmotionAnalyzeRequest):
     Returns the detected emotion, confidence score, and per-sentence breakdown.
     """
     try:
-        # Get overall emotion
-        emotion_result = analyze_emotion(request.text)
-        
-        # Get per-sentence analysis
-        sentence_results = analyze_sentences(request.text)
+        with time_stage("emotion_analysis"):
+            # Get overall emotion
+            emotion_result = cached_emotion_analysis(request.text)
+            
+            # Get per-sentence analysis
+            sentence_results = cached_emotion_analysis(request.text, sentences=True)
         
         return EmotionAnalyzeResponse(
             detected_emotion=emotion_result["detected_emotion"],
@@ -341,3 +747,72 @@ def analyze_text_emotion(request: EmotionAnalyzeRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+def request_text(http_request: Request):
+    """
+    Yield a request body as text while it is still arriving, for a sync
+    generator running in a worker thread. Multi-byte characters split across
+    body chunks are decoded once complete; invalid UTF-8 becomes U+FFFD.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    body = http_request.stream()
+
+    async def next_chunk():
+        try:
+            return await body.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    while True:
+        chunk = anyio.from_thread.run(next_chunk)
+        if chunk is None:
+            break
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator reads the request body itself.
+
+    StreamingResponse normally listens for a disconnect by reading the request
+    messages, which would swallow the body chunks the iterator is waiting for.
+    Here a disconnect while the body is arriving surfaces from the request
+    stream as ClientDisconnect instead.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+@app.post("/analyze-emotion/stream")
+def analyze_text_emotion_stream(http_request: Request, language: Optional[str] = None):
+    """
+    Per-sentence emotion analysis of a plain-text body of any size, as NDJSON.
+
+    Sentences are analyzed as the body arrives and each result is sent as soon
+    as its sentence is complete, one JSON object per line:
+    {"index": 0, "text": "...", "emotion": "happy", "confidence": 0.9}. A
+    final {"done": true, "sentences": n} line marks a complete response.
+    Memory use does not grow with the size of the document.
+    """
+    def lines():
+        count = 0
+        for result in emotion_analyzer.analyze_stream(request_text(http_request), language):
+            yield json.dumps({
+                "index": count,
+                "text": result.text,
+                "emotion": result.emotion,
+                "confidence": result.confidence,
+            }, ensure_ascii=False) + "\n"
+            count += 1
+        log_event(logger, "emotion.stream_analyzed", sentences=count, language=language)
+        yield json.dumps({"done": True, "sentences": count}) + "\n"
+
+    return BodyStreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,169 @@
+"""
+Metadata Catalog - Compiles the voice metadata maps (gender, language, style, age, avatar)
+into a single artifact that is loaded lazily and hot-reloaded when it changes on disk.
+
+Build the artifact after editing any *_data.json file:
+    python metadata_catalog.py
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from language_resolver import LanguageResolver
+from metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CATALOG_FILE = "metadata_catalog.json"
+
+# Catalog section -> source file it is compiled from
+SOURCE_FILES = {
+    "gender": "gender_data.json",
+    "language": "language_data.json",
+    "style": "style_data.json",
+    "age": "age_data.json",
+    "avatar": "avatar_data.json",
+}
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable view of the metadata maps. Swapped as a whole on reload."""
+    version: str
+    gender: Dict[str, str] = field(default_factory=dict)
+    language: Dict[str, str] = field(default_factory=dict)
+    style: Dict[str, List[str]] = field(default_factory=dict)
+    age: Dict[str, str] = field(default_factory=dict)
+    avatar: Dict[str, str] = field(default_factory=dict)
+    resolver: Optional[LanguageResolver] = None
+
+    def __post_init__(self):
+        # Compile the name -> language index once per catalog load
+        if self.resolver is None:
+            object.__setattr__(self, "resolver", LanguageResolver(self.language))
+
+
+def _catalog_version(sections: Dict[str, dict]) -> str:
+    canonical = json.dumps(sections, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+
+def compile_catalog(base_dir: str = BASE_DIR) -> Dict:
+    """
+    Merge the source JSON maps into one catalog document.
+
+    A source that is missing or invalid compiles to an empty section.
+
+    Returns:
+        Dictionary with 'version' plus one key per section in SOURCE_FILES
+    """
+    sections = {}
+    for section, filename in SOURCE_FILES.items():
+        path = os.path.join(base_dir, filename)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                sections[section] = json.load(f)
+        except Exception as e:
+            logger.warning("Could not load %s: %s", filename, e)
+            sections[section] = {}
+    return {"version": _catalog_version(sections), **sections}
+
+
+def write_catalog(catalog: Dict, path: str) -> None:
+    """Write the catalog atomically so a running server never sees a partial file."""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+class MetadataCatalog:
+    """
+    Lazily loaded, hot-reloadable metadata catalog.
+
+    The compiled artifact is preferred; if any source file is newer than the
+    artifact (or the artifact is missing) the sources are compiled in memory
+    instead. File modification times are checked at most every
+    ``check_interval`` seconds, and a reload replaces the snapshot in a single
+    reference assignment, so readers never see a half-updated catalog.
+    """
+
+    def __init__(self, base_dir: str = BASE_DIR, check_interval: float = 5.0):
+        self.base_dir = base_dir
+        self.check_interval = check_interval
+        self.catalog_path = os.path.join(base_dir, CATALOG_FILE)
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._signature: Optional[Tuple] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _stat_signature(self) -> Tuple:
+        signature = []
+        for filename in (CATALOG_FILE, *SOURCE_FILES.values()):
+            try:
+                signature.append(os.stat(os.path.join(self.base_dir, filename)).st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load(self, signature: Tuple) -> CatalogSnapshot:
+        artifact_mtime, source_mtimes = signature[0], [m for m in signature[1:] if m is not None]
+        document = None
+        if artifact_mtime is not None and artifact_mtime >= max(source_mtimes, default=0):
+            try:
+                with open(self.catalog_path, "r", encoding="utf-8") as f:
+                    document = json.load(f)
+            except Exception as e:
+                logger.warning("Could not load %s, compiling sources instead: %s", CATALOG_FILE, e)
+        if document is None:
+            document = compile_catalog(self.base_dir)
+
+        snapshot = CatalogSnapshot(
+            version=document.get("version", ""),
+            **{section: document.get(section) or {} for section in SOURCE_FILES},
+        )
+        logger.info(
+            "Loaded metadata catalog %s (%s)",
+            snapshot.version,
+            ", ".join(f"{len(getattr(snapshot, s))} {s}" for s in SOURCE_FILES),
+        )
+        return snapshot
+
+    def get(self) -> CatalogSnapshot:
+        """Return the current snapshot, loading or reloading it if needed."""
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() < self._next_check:
+            record_cache("metadata_catalog", True)
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() < self._next_check:
+                return self._snapshot
+            signature = self._stat_signature()
+            reload = self._snapshot is None or signature != self._signature
+            record_cache("metadata_catalog", not reload)
+            if reload:
+                try:
+                    self._snapshot = self._load(signature)
+                    self._signature = signature
+                except Exception as e:
+                    # Keep serving the previous snapshot if a reload fails
+                    logger.warning("Metadata catalog reload failed: %s", e)
+                    if self._snapshot is None:
+                        self._snapshot = CatalogSnapshot(version="")
+            self._next_check = time.monotonic() + self.check_interval
+            return self._snapshot
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    catalog = compile_catalog()
+    write_catalog(catalog, os.path.join(BASE_DIR, CATALOG_FILE))
+    print(f"Wrote {CATALOG_FILE} (version {catalog['version']})")
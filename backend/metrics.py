@@ -0,0 +1,183 @@
+"""
+Metrics - Prometheus instrumentation for the request hot paths, exported on GET /metrics.
+
+Label children are resolved once and cached, so recording a stage costs one
+perf_counter pair and one histogram observe (a few microseconds).
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory so /metrics aggregates every worker instead of whichever one
+happened to serve the scrape.
+"""
+
+import os
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+# Stages of a /generate or /analyze-emotion request
+STAGES = ("split_text", "upstream_tts", "combine_audio", "base64_encode", "emotion_analysis")
+
+# Endpoints with their own in-flight gauge; everything else is reported as "other"
+TRACKED_PATHS = ("/generate", "/voices", "/analyze-emotion")
+
+STAGE_SECONDS = Histogram(
+    "voiceforge_stage_seconds",
+    "Time spent in each request stage",
+    ["stage"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+UPSTREAM_SECONDS = Histogram(
+    "voiceforge_upstream_tts_seconds",
+    "Latency of upstream Typecast text-to-speech calls",
+    ["model", "chunk_size"],
+    buckets=(0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 60),
+)
+UPSTREAM_ERRORS = Counter(
+    "voiceforge_upstream_tts_errors_total",
+    "Failed upstream Typecast text-to-speech calls",
+    ["model", "error"],
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "voiceforge_upstream_tts_in_flight",
+    "Upstream Typecast text-to-speech calls in progress",
+    multiprocess_mode="livesum",
+)
+SCHEDULER_QUEUED = Gauge(
+    "voiceforge_scheduler_queued_chunks",
+    "Chunks waiting in the shared chunk scheduler",
+    ["priority"],
+    multiprocess_mode="livesum",
+)
+SCHEDULER_WAIT_SECONDS = Histogram(
+    "voiceforge_scheduler_wait_seconds",
+    "Time chunks spend queued in the shared chunk scheduler before a worker starts them",
+    ["priority"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+CHUNKS_PER_REQUEST = Histogram(
+    "voiceforge_chunks_per_request",
+    "Number of text chunks a generate request was split into",
+    buckets=(1, 2, 3, 4, 6, 9, 12, 18, 30, 60, 120),
+)
+AUDIO_BYTES = Counter(
+    "voiceforge_audio_bytes_total",
+    "Audio bytes returned to clients",
+    ["format"],
+)
+CACHE_REQUESTS = Counter(
+    "voiceforge_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+CREDIT_REJECTIONS = Counter(
+    "voiceforge_credit_preflight_rejections_total",
+    "Generate requests rejected before fan-out for lack of credits",
+)
+PEER_REQUESTS = Counter(
+    "voiceforge_cluster_peer_requests_total",
+    "Cluster cache requests sent to peer nodes by operation and result",
+    ["op", "result"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "voiceforge_requests_in_flight",
+    "HTTP requests in progress",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+
+_STAGE_CHILDREN = {stage: STAGE_SECONDS.labels(stage) for stage in STAGES}
+_IN_FLIGHT_CHILDREN = {path: REQUESTS_IN_FLIGHT.labels(path) for path in TRACKED_PATHS}
+_IN_FLIGHT_OTHER = REQUESTS_IN_FLIGHT.labels("other")
+_AUDIO_BYTES_CHILDREN = {fmt: AUDIO_BYTES.labels(fmt) for fmt in ("wav", "mp3")}
+_UPSTREAM_CHILDREN: Dict[Tuple[str, str], object] = {}
+_CACHE_CHILDREN: Dict[Tuple[str, bool], object] = {}
+
+# Upper bounds (in characters) of the chunk_size label buckets
+_CHUNK_SIZE_BOUNDS = (250, 500, 1000, 1500)
+
+
+class _StageTimer:
+    """Context manager observing elapsed wall time into a stage histogram."""
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+def time_stage(stage: str) -> _StageTimer:
+    """Time a block of code as one of STAGES: ``with time_stage("split_text"): ...``"""
+    return _StageTimer(_STAGE_CHILDREN[stage])
+
+
+def chunk_size_label(length: int) -> str:
+    """Bucket a chunk length into a low-cardinality label such as '<=500'."""
+    for bound in _CHUNK_SIZE_BOUNDS:
+        if length <= bound:
+            return f"<={bound}"
+    return f">{_CHUNK_SIZE_BOUNDS[-1]}"
+
+
+def observe_upstream(model: str, length: int, seconds: float) -> None:
+    """Record the latency of one successful upstream TTS call."""
+    key = (model, chunk_size_label(length))
+    child = _UPSTREAM_CHILDREN.get(key)
+    if child is None:
+        child = _UPSTREAM_CHILDREN.setdefault(key, UPSTREAM_SECONDS.labels(*key))
+    child.observe(seconds)
+
+
+def record_audio_bytes(audio_format: str, size: int) -> None:
+    """Count audio bytes returned to a client."""
+    _AUDIO_BYTES_CHILDREN["mp3" if audio_format == "mp3" else "wav"].inc(size)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count one cache lookup."""
+    key = (cache, hit)
+    child = _CACHE_CHILDREN.get(key)
+    if child is None:
+        child = _CACHE_CHILDREN.setdefault(key, CACHE_REQUESTS.labels(cache, "hit" if hit else "miss"))
+    child.inc()
+
+
+def record_peer_request(op: str, result: str) -> None:
+    """Count one cluster cache request to a peer node."""
+    PEER_REQUESTS.labels(op, result).inc()
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Serialize all metrics in the Prometheus text exposition format."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+class InFlightMiddleware:
+    """ASGI middleware keeping the per-endpoint in-flight gauge up to date."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        gauge = _IN_FLIGHT_CHILDREN.get(scope["path"], _IN_FLIGHT_OTHER)
+        gauge.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gauge.dec()
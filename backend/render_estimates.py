@@ -0,0 +1,128 @@
+"""
+Render Estimates - Online models of how long synthesized audio will be and how
+long the upstream takes to render it, learned from completed chunks.
+
+Speaking rate is tracked per voice as seconds of audio per character at speed
+1.0 (an exponentially weighted average, shrunk towards the all-voice rate
+until the voice has a few samples). Upstream latency is tracked per model as a
+linear fit of seconds against chunk characters, with old observations decaying
+so the fit follows the provider's current performance. Both start from priors
+and are kept in memory per worker.
+
+The latency model also orders a request's chunks for the scheduler: longest
+predicted first (LPT), which keeps the last slot from finishing long after the
+others, and predicts the request's wall time by simulating that schedule.
+"""
+
+import heapq
+import threading
+from typing import Dict, List, Tuple
+
+# Priors used until chunks have been observed
+DEFAULT_SECONDS_PER_CHAR = 0.065
+DEFAULT_LATENCY_BASE = 0.8         # Seconds per upstream call
+DEFAULT_LATENCY_PER_CHAR = 0.0015  # Additional seconds per character
+
+# Weight of each new speaking-rate sample
+RATE_ALPHA = 0.2
+# Samples a voice needs before its own rate outweighs the all-voice rate
+RATE_PRIOR_SAMPLES = 3
+# Per-observation decay of the latency fit (about 140 observations half-life)
+LATENCY_DECAY = 0.995
+
+
+class _RateEstimate:
+    __slots__ = ("value", "samples")
+
+    def __init__(self, value: float):
+        self.value = value
+        self.samples = 0
+
+    def update(self, sample: float) -> None:
+        # Average plainly until the EWMA window is full so early samples are not swamped by the prior
+        alpha = max(RATE_ALPHA, 1.0 / (self.samples + 1))
+        self.value += alpha * (sample - self.value)
+        self.samples += 1
+
+
+class _LatencyFit:
+    """Exponentially decayed least-squares fit of latency = base + per_char * chars."""
+
+    __slots__ = ("w", "sx", "sy", "sxx", "sxy")
+
+    def __init__(self):
+        self.w = self.sx = self.sy = self.sxx = self.sxy = 0.0
+
+    def update(self, chars: float, seconds: float) -> None:
+        self.w = self.w * LATENCY_DECAY + 1.0
+        self.sx = self.sx * LATENCY_DECAY + chars
+        self.sy = self.sy * LATENCY_DECAY + seconds
+        self.sxx = self.sxx * LATENCY_DECAY + chars * chars
+        self.sxy = self.sxy * LATENCY_DECAY + chars * seconds
+
+    def coefficients(self) -> Tuple[float, float]:
+        if self.w == 0:
+            return DEFAULT_LATENCY_BASE, DEFAULT_LATENCY_PER_CHAR
+        mean_x, mean_y = self.sx / self.w, self.sy / self.w
+        var_x = self.sxx / self.w - mean_x * mean_x
+        if self.w < 3 or var_x < 1.0:
+            # Chunk sizes too alike to fit a slope; keep the prior slope and fit the base
+            per_char = DEFAULT_LATENCY_PER_CHAR
+        else:
+            per_char = max((self.sxy / self.w - mean_x * mean_y) / var_x, 0.0)
+        return max(mean_y - per_char * mean_x, 0.0), per_char
+
+
+class RenderEstimates:
+    """Thread-safe per-voice speaking-rate and per-model latency models."""
+
+    def __init__(self):
+        self._rates: Dict[str, _RateEstimate] = {}
+        self._all_voices = _RateEstimate(DEFAULT_SECONDS_PER_CHAR)
+        self._latency: Dict[str, _LatencyFit] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, voice_id: str, model: str, speed: float, chars: int,
+                audio_seconds: float, upstream_seconds: float) -> None:
+        """Record one rendered chunk."""
+        if chars <= 0:
+            return
+        with self._lock:
+            if audio_seconds > 0:
+                rate = audio_seconds * (speed or 1.0) / chars
+                self._rates.setdefault(voice_id, _RateEstimate(self._all_voices.value)).update(rate)
+                self._all_voices.update(rate)
+            self._latency.setdefault(model, _LatencyFit()).update(chars, upstream_seconds)
+
+    def audio_seconds(self, voice_id: str, chars: int, speed: float = 1.0) -> float:
+        """Predicted audio length of chars characters read by voice_id."""
+        with self._lock:
+            overall = self._all_voices.value
+            voice = self._rates.get(voice_id)
+            if voice is None:
+                rate = overall
+            else:
+                rate = (voice.value * voice.samples + overall * RATE_PRIOR_SAMPLES) / (voice.samples + RATE_PRIOR_SAMPLES)
+        return rate * chars / (speed or 1.0)
+
+    def upstream_seconds(self, model: str, chars: int) -> float:
+        """Predicted latency of one upstream call for a chunk of chars characters."""
+        with self._lock:
+            fit = self._latency.get(model)
+            base, per_char = fit.coefficients() if fit is not None else (DEFAULT_LATENCY_BASE, DEFAULT_LATENCY_PER_CHAR)
+        return base + per_char * chars
+
+
+def lpt_order(latencies: Dict[int, float]) -> List[int]:
+    """Chunk indices, longest predicted latency first (ties keep text order)."""
+    return sorted(latencies, key=lambda i: (-latencies[i], i))
+
+
+def simulate_wall_time(latencies: List[float], slots: int) -> float:
+    """Finish time of running tasks, in the given order, on ``slots`` parallel slots."""
+    if not latencies:
+        return 0.0
+    free_at = [0.0] * max(1, min(slots, len(latencies)))
+    for latency in latencies:
+        heapq.heappush(free_at, heapq.heappop(free_at) + latency)
+    return max(free_at)
@@ -0,0 +1,125 @@
+"""
+Render Revisions - Remembers the chunk plan of each render so a revised script
+can be re-rendered by synthesizing only what changed.
+
+A revision is diffed against the previous render sentence by sentence. Every
+old chunk whose sentences all survive unchanged and in order is kept verbatim,
+so its audio comes straight from the audio cache; only the runs of inserted or
+edited sentences between kept chunks are planned as new chunks. Re-render
+cost therefore scales with the size of the edit rather than the script.
+"""
+
+import difflib
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from text_segmenter import sentence_spans
+
+# Render manifests live as long as the audio they reference
+from typecast_service import AUDIO_CACHE_TTL
+
+
+@dataclass
+class RevisionPlan:
+    """Chunk plan for a revised script and how much of it is new."""
+    chunks: List[str] = field(default_factory=list)
+    reused_chunks: int = 0
+    new_chunks: int = 0
+    new_characters: int = 0
+
+
+class RenderStore:
+    """Render manifests (settings + chunk plan) in the shared cache, keyed by render id."""
+
+    def __init__(self, cache, ttl: float = AUDIO_CACHE_TTL):
+        self.cache = cache
+        self.ttl = ttl
+
+    def save(self, settings: Dict, chunks: List[str]) -> str:
+        """Store a render's manifest and return its new render id."""
+        render_id = uuid.uuid4().hex
+        self.cache.set_json("render", render_id, {"settings": settings, "chunks": chunks}, ttl=self.ttl)
+        return render_id
+
+    def load(self, render_id: str) -> Optional[Dict]:
+        """Return {"settings", "chunks"} for a render, or None if unknown or expired."""
+        return self.cache.get_json("render", render_id)
+
+
+def plan_revision(old_chunks: List[str], text: str, split_text) -> RevisionPlan:
+    """
+    Plan chunks for a new script version, reusing unchanged chunks of the old plan.
+
+    Args:
+        old_chunks: Chunk plan of the previous render
+        text: The revised script
+        split_text: Chunker for changed runs, e.g. TypecastService.plan_chunks
+
+    Returns:
+        RevisionPlan with the new chunk list, in script order
+    """
+    # Old sentences, each tagged with the chunk it belongs to
+    old_sentences: List[str] = []
+    old_owner: List[int] = []
+    for index, chunk in enumerate(old_chunks):
+        for start, end in sentence_spans(chunk):
+            old_sentences.append(chunk[start:end])
+            old_owner.append(index)
+
+    new_spans = sentence_spans(text)
+    new_sentences = [text[start:end] for start, end in new_spans]
+
+    # new sentence index -> old sentence index, for sentences the diff keeps
+    kept: Dict[int, int] = {}
+    matcher = difflib.SequenceMatcher(None, old_sentences, new_sentences, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            kept.update(zip(range(j1, j2), range(i1, i2)))
+
+    # An old chunk is reusable where all of its sentences appear consecutively
+    # in the new script: new sentence j starts it and covers len(chunk) sentences
+    chunk_first: Dict[int, int] = {}
+    chunk_size: Dict[int, int] = {}
+    for i, owner in enumerate(old_owner):
+        chunk_first.setdefault(owner, i)
+        chunk_size[owner] = chunk_size.get(owner, 0) + 1
+
+    def reusable_at(j: int) -> Optional[Tuple[int, int]]:
+        i = kept.get(j)
+        if i is None:
+            return None
+        owner = old_owner[i]
+        first, size = chunk_first[owner], chunk_size[owner]
+        if i != first or any(kept.get(j + k) != first + k for k in range(size)):
+            return None
+        return owner, size
+
+    plan = RevisionPlan()
+    run_start = None  # First new sentence of the current changed run
+
+    def close_run(end_sentence: int):
+        if run_start is None:
+            return
+        run_text = text[new_spans[run_start][0]:new_spans[end_sentence - 1][1]]
+        run_chunks = split_text(run_text)
+        plan.chunks.extend(run_chunks)
+        plan.new_chunks += len(run_chunks)
+        plan.new_characters += sum(len(c) for c in run_chunks)
+
+    j = 0
+    while j < len(new_sentences):
+        reuse = reusable_at(j)
+        if reuse is None:
+            if run_start is None:
+                run_start = j
+            j += 1
+            continue
+        close_run(j)
+        run_start = None
+        owner, size = reuse
+        plan.chunks.append(old_chunks[owner])
+        plan.reused_chunks += 1
+        j += size
+    close_run(len(new_sentences))
+    return plan
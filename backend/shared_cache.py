@@ -0,0 +1,132 @@
+"""
+Shared Cache - A SQLite (WAL mode) key-value store shared by every worker process on a host.
+
+Used for rendered audio, voice lists and emotion analysis results so that
+running several uvicorn workers does not duplicate work or split hit rates.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+from metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.path.join(tempfile.gettempdir(), "voiceforge_cache.sqlite3")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Run expiry/size eviction once every this many writes
+EVICT_EVERY = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace  TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    value      BLOB NOT NULL,
+    size       INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_created ON cache (created_at);
+"""
+
+
+class SharedCache:
+    """
+    Cross-process cache with per-entry TTL.
+
+    Each thread gets its own SQLite connection; WAL mode lets readers in all
+    processes proceed while one writer commits. Once the store grows past
+    ``max_bytes``, the oldest entries are evicted first.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.path = path or os.getenv("VOICEFORGE_CACHE_PATH", DEFAULT_PATH)
+        self.max_bytes = max_bytes or int(os.getenv("VOICEFORGE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+        self._local = threading.local()
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._connect()  # Create the schema up front
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """Return the cached value, or None if missing, expired or unreadable."""
+        try:
+            row = self._connect().execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning("Shared cache read failed: %s", e)
+            row = None
+        hit = row is not None and (row[1] is None or row[1] > time.time())
+        record_cache(namespace, hit)
+        return bytes(row[0]) if hit else None
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Store value, replacing any previous entry. Failures are logged, never raised."""
+        now = time.time()
+        try:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, sqlite3.Binary(value), len(value), now, now + ttl if ttl else None),
+            )
+        except sqlite3.Error as e:
+            logger.warning("Shared cache write failed: %s", e)
+            return
+
+        with self._writes_lock:
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def get_json(self, namespace: str, key: str) -> Any:
+        value = self.get(namespace, key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.set(namespace, key, json.dumps(value, separators=(",", ":")).encode("utf-8"), ttl)
+
+    def delete(self, namespace: str, key: str) -> None:
+        try:
+            self._connect().execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+        except sqlite3.Error as e:
+            logger.warning("Shared cache delete failed: %s", e)
+
+    def evict(self) -> None:
+        """Drop expired entries, then the oldest entries while over max_bytes."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Delete oldest entries until back under 90% of the limit
+            excess = total - int(self.max_bytes * 0.9)
+            cutoff = conn.execute(
+                "SELECT created_at FROM (SELECT created_at, SUM(size) OVER (ORDER BY created_at) AS running "
+                "FROM cache) WHERE running >= ? LIMIT 1",
+                (excess,),
+            ).fetchone()
+            if cutoff:
+                conn.execute("DELETE FROM cache WHERE created_at <= ?", (cutoff[0],))
+        except sqlite3.Error as e:
+            logger.warning("Shared cache eviction failed: %s", e)
@@ -0,0 +1,204 @@
+"""
+Structured Logging - JSON log records written off the request thread.
+
+Records go through a QueueHandler to a background QueueListener, so request
+threads never block on stdout. Every record carries the id of the HTTP
+request that produced it (including records from chunk worker threads), and
+noisy events can be sampled or rate limited per event name.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Id of the HTTP request being served on this thread/task ("-" outside requests)
+request_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+REQUEST_ID_HEADER = "x-request-id"
+
+# Attributes every LogRecord has; anything else was passed as a structured field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+@dataclass
+class EventPolicy:
+    """Sampling and rate limit for one event name."""
+    sample_rate: float = 1.0           # Fraction of events kept (0-1)
+    per_second: Optional[float] = None  # Max events per second, None for unlimited
+
+
+# Defaults for the chattiest request-path events
+EVENT_POLICIES: Dict[str, EventPolicy] = {
+    "voices.request": EventPolicy(sample_rate=0.1),
+    "tts.chunk_start": EventPolicy(per_second=20),
+    "smart_emotion.detected": EventPolicy(sample_rate=0.25),
+}
+
+
+class _TokenBucket:
+    __slots__ = ("rate", "tokens", "updated", "lock")
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+_buckets: Dict[str, _TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def set_event_policy(event: str, sample_rate: float = 1.0, per_second: Optional[float] = None) -> None:
+    """Override the sampling/rate limit for an event."""
+    EVENT_POLICIES[event] = EventPolicy(sample_rate=sample_rate, per_second=per_second)
+    with _buckets_lock:
+        _buckets.pop(event, None)
+
+
+def _allowed(event: str) -> bool:
+    policy = EVENT_POLICIES.get(event)
+    if policy is None:
+        return True
+    if policy.sample_rate < 1.0 and random.random() >= policy.sample_rate:
+        return False
+    if policy.per_second is not None:
+        bucket = _buckets.get(event)
+        if bucket is None:
+            with _buckets_lock:
+                bucket = _buckets.setdefault(event, _TokenBucket(policy.per_second))
+        return bucket.take()
+    return True
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO,
+              message: str = "", exc_info=None, **fields) -> None:
+    """
+    Log a structured event, subject to its EventPolicy.
+
+    Args:
+        logger: Logger to emit through
+        event: Dotted event name, e.g. "tts.chunk_start"
+        level: Logging level
+        message: Optional human readable message
+        **fields: Structured fields added to the JSON record
+    """
+    if not logger.isEnabledFor(level) or not _allowed(event):
+        return
+    logger.log(level, message or event, exc_info=exc_info, extra={"event": event, **fields})
+
+
+class _RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id on the emitting thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(level: Optional[str] = None) -> None:
+    """Route root logging through a background queue to JSON lines on stdout. Idempotent."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.Queue = queue.Queue(maxsize=10000)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter())
+
+    queue_handler = _NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(_RequestIdFilter())
+
+    root = logging.getLogger()
+    root.addHandler(queue_handler)
+    root.setLevel(level or os.getenv("LOG_LEVEL", "INFO").upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+class RequestIdMiddleware:
+    """ASGI middleware assigning each HTTP request an id (or reusing X-Request-ID) and echoing it back."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (REQUEST_ID_HEADER.encode(), request_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
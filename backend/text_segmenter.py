@@ -0,0 +1,200 @@
+"""
+Sentence Segmenter - Splits text into sentences and clauses for the languages supported by ssfm-v21.
+Shared by the TTS chunker and the emotion analyzer so both agree on sentence boundaries.
+"""
+
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+Span = Tuple[int, int]
+
+# Sentence terminators that only end a sentence when followed by whitespace
+SPACED_TERMINATORS = {
+    "default": ".!?",
+    "ar": ".!?\u061f",   # Arabic question mark
+    "el": ".!?;\u037e",  # Greek uses ';' (or U+037E) as its question mark
+}
+
+# Full-width terminators that end a sentence even without trailing whitespace
+UNSPACED_TERMINATORS = {
+    "default": "",
+    "ja": "\u3002\uff01\uff1f\uff0e\uff61",  # 。！？．｡
+    "zh": "\u3002\uff01\uff1f\uff0e",        # 。！？．
+    "ko": "\u3002\uff01\uff1f",              # 。！？ (mostly Western punctuation)
+}
+
+# Closing quotes/brackets that belong to the sentence they follow (」』）”’ etc.)
+CLOSERS = "\u300d\u300f\uff09\u3011\u3009\u300b\u201d\u2019\"')"
+
+# Clause separators used to break up overlong sentences
+SPACED_CLAUSE_SEPARATORS = ",;\u060c\u061b"                # , ; and Arabic comma/semicolon
+UNSPACED_CLAUSE_SEPARATORS = "\u3001\uff0c\uff1b\uff1a"  # 、，；：
+
+
+def _union(table: dict) -> str:
+    return "".join(sorted(set("".join(table.values()))))
+
+
+def _compile_boundary(spaced: str, unspaced: str) -> "re.Pattern":
+    """Compile a pattern matching the end of each sentence.
+
+    A match covers the terminator (plus closing quotes for full-width scripts)
+    and group 1 the whitespace after it, which belongs to neither sentence.
+    """
+    terminators = rf"[{re.escape(spaced)}](?=\s)"
+    if unspaced:
+        # Take runs such as 。。。 whole and keep trailing closers attached
+        terminators += rf"|[{re.escape(unspaced)}]+[{re.escape(CLOSERS)}]*"
+    return re.compile(rf"(?:{terminators})(\s*)")
+
+
+@lru_cache(maxsize=None)
+def _boundary_pattern(language: Optional[str]) -> "re.Pattern":
+    if language is None:
+        # Language-agnostic: recognise every script's terminators except Greek ';'
+        spaced = _union({k: v for k, v in SPACED_TERMINATORS.items() if k != "el"}) + "\u037e"
+        return _compile_boundary(spaced, _union(UNSPACED_TERMINATORS))
+    language = language.lower()[:2]
+    return _compile_boundary(
+        SPACED_TERMINATORS.get(language, SPACED_TERMINATORS["default"]),
+        UNSPACED_TERMINATORS.get(language, ""),
+    )
+
+
+CLAUSE_RE = re.compile(
+    rf"(?:[{re.escape(SPACED_CLAUSE_SEPARATORS)}](?=\s)"
+    rf"|[{re.escape(UNSPACED_CLAUSE_SEPARATORS)}])(\s*)"
+)
+
+# Precompile the language-agnostic pattern used by default
+_boundary_pattern(None)
+
+
+def _split_spans(pattern: "re.Pattern", text: str, start: int, end: int) -> List[Span]:
+    """Split text[start:end] after each pattern match, returning non-empty spans."""
+    spans = []
+    append = spans.append
+    pos = start
+    for match in pattern.finditer(text, start, end):
+        stop = match.start(1)
+        if stop > pos:
+            append((pos, stop))
+        pos = match.end()
+    if pos < end:
+        append((pos, end))
+    return spans
+
+
+def _bounded(text: str, span: Span, max_chars: int) -> List[Span]:
+    """Cut a span longer than max_chars into even pieces at whitespace where possible, else hard cut."""
+    start, end = span
+    spans = []
+    while end - start > max_chars:
+        pieces = -(-(end - start) // max_chars)
+        limit = start + -(-(end - start) // pieces)
+        cut = max(text.rfind(" ", start + 1, limit + 1), text.rfind("\n", start + 1, limit + 1))
+        if cut <= start:
+            spans.append((start, limit))
+            start = limit
+        else:
+            spans.append((start, cut))
+            start = cut
+            while start < end and text[start].isspace():
+                start += 1
+    if start < end:
+        spans.append((start, end))
+    return spans
+
+
+def sentence_spans(text: str, language: Optional[str] = None, max_chars: Optional[int] = None) -> List[Span]:
+    """
+    Find sentence boundaries in text.
+
+    Args:
+        text: The input text
+        language: ISO 639-1 code; None recognises the terminators of every supported script
+        max_chars: If set, sentences longer than this are split by clause, then word, then hard cut
+
+    Returns:
+        List of (start, end) offsets into text, without the whitespace between sentences
+    """
+    start = len(text) - len(text.lstrip())
+    end = len(text.rstrip())
+    spans = _split_spans(_boundary_pattern(language), text, start, end) if start < end else []
+    if max_chars is None:
+        return spans
+
+    bounded = []
+    for span in spans:
+        if span[1] - span[0] <= max_chars:
+            bounded.append(span)
+            continue
+        for clause in _split_spans(CLAUSE_RE, text, span[0], span[1]):
+            bounded.extend(_bounded(text, clause, max_chars))
+    return bounded
+
+
+def split_sentences(text: str, language: Optional[str] = None) -> List[str]:
+    """Split text into sentences. See sentence_spans for the arguments."""
+    return [text[start:end] for start, end in sentence_spans(text, language)]
+
+
+class IncrementalSegmenter:
+    """
+    Sentence segmentation for text that arrives in pieces (e.g. LLM tokens).
+
+    feed() returns the sentences completed so far; a boundary is only accepted
+    once some text follows it, so a closing quote or more whitespace arriving
+    in the next piece cannot change it. flush() returns whatever is left.
+
+    Args:
+        language: As for sentence_spans
+        max_chars: Emit text without a sentence boundary once it grows past this
+        min_chars: Hold back sentences shorter than this and join them to the next one
+    """
+
+    def __init__(self, language: Optional[str] = None, max_chars: Optional[int] = None, min_chars: int = 0):
+        self.language = language
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        self._pattern = _boundary_pattern(language)
+        self._buffer = ""
+        self._start = 0  # Start of the sentence being accumulated in _buffer
+
+    def feed(self, text: str) -> List[str]:
+        """Add text and return the sentences it completed, in order."""
+        self._buffer += text
+        buffer = self._buffer
+        sentences = []
+        for match in self._pattern.finditer(buffer, self._start):
+            if match.end() >= len(buffer):
+                break
+            if match.start(1) - self._start >= self.min_chars:
+                sentences.append(buffer[self._start:match.start(1)].strip())
+                self._start = match.end()
+
+        # No boundary in sight: cut overlong text at the last clause separator,
+        # else the last whitespace, else hard at max_chars
+        while self.max_chars is not None and len(buffer) - self._start > self.max_chars:
+            limit = self._start + self.max_chars
+            cut = resume = None
+            for match in CLAUSE_RE.finditer(buffer, self._start, limit):
+                cut, resume = match.start(1), match.end()
+            if cut is None:
+                space = max(buffer.rfind(" ", self._start + 1, limit + 1), buffer.rfind("\n", self._start + 1, limit + 1))
+                cut = resume = space if space > self._start else limit
+            sentences.append(buffer[self._start:cut].strip())
+            self._start = resume
+
+        # Drop consumed text so later scans only cover the open sentence
+        self._buffer = buffer[self._start:]
+        self._start = 0
+        return [s for s in sentences if s]
+
+    def flush(self) -> List[str]:
+        """Return the remaining text as the final sentence (if any) and reset."""
+        rest = self._buffer.strip()
+        self._buffer = ""
+        self._start = 0
+        return [rest] if rest else []
@@ -1,20 +1,95 @@
 import os
 import asyncio
+import contextvars
+import hashlib
 import io
-import struct
+import json
+import logging
 import re
+import struct
+import time
+import requests
 from typecast.client import Typecast
 from typecast.models import TTSRequest, Output, LanguageCode, Prompt
-from typecast.exceptions import TypecastError
+from typecast.exceptions import PaymentRequiredError, TypecastError
+from text_segmenter import sentence_spans
+from metrics import (
+    CHUNKS_PER_REQUEST, UPSTREAM_ERRORS, UPSTREAM_IN_FLIGHT, observe_upstream, time_stage,
+)
+from structured_logging import log_event
+from shared_cache import SharedCache
+from credit_ledger import CreditLedger, InsufficientCreditsError, estimate_credits
+from key_limits import KeyConcurrencyLimiter, key_fingerprint
+from chunk_scheduler import ChunkScheduler
+from cancellation import CancelToken, RenderCancelled
+from render_estimates import RenderEstimates, lpt_order, simulate_wall_time
+
+logger = logging.getLogger(__name__)
+
+# Cache lifetimes in seconds
+AUDIO_CACHE_TTL = int(os.getenv("AUDIO_CACHE_TTL", 7 * 24 * 3600))
+VOICES_CACHE_TTL = int(os.getenv("VOICES_CACHE_TTL", 600))
+
+
+# Repeated paragraphs/sentences at least this long are rendered once per request
+DEDUP_MIN_CHARS = int(os.getenv("DEDUP_MIN_CHARS", 40))
+# Characters a repeat must save per extra upstream call its own chunks cost
+# (an upstream call's fixed latency is worth roughly this much text)
+DEDUP_CHARS_PER_CALL = int(os.getenv("DEDUP_CHARS_PER_CALL", 500))
+
+PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+
+# How often a render waiting on its chunks checks for cancellation
+CANCEL_POLL_SECONDS = 0.1
+
+
+class _DeadlineSession(requests.Session):
+    """Session whose requests time out when the render's deadline passes."""
+
+    def __init__(self, cancel: CancelToken):
+        super().__init__()
+        self.cancel = cancel
+
+    def request(self, *args, **kwargs):
+        remaining = self.cancel.remaining()
+        if remaining is not None and kwargs.get("timeout") is None:
+            kwargs["timeout"] = max(remaining, 0.001)
+        return super().request(*args, **kwargs)
+
 
 class TypecastService:
-    def _get_client(self, api_key: str):
+    def __init__(self, cache: SharedCache = None):
+        # Optional cross-process cache for rendered audio and voice lists
+        self.cache = cache
+        # Per-key credit balances for rejecting unaffordable requests before fan-out
+        self.credits = CreditLedger(self.get_remaining_credits)
+        # Per-key cap on concurrent upstream calls, and the pool every chunk runs on
+        self.key_limits = KeyConcurrencyLimiter()
+        self.scheduler = ChunkScheduler(self.key_limits)
+        # Learned speaking rates and upstream latencies, for /generate/plan and chunk ordering
+        self.estimates = RenderEstimates()
+
+    def _get_client(self, api_key: str, cancel: CancelToken = None):
         if not api_key:
             raise ValueError("API Key is required")
+        if cancel is not None and cancel.deadline is not None:
+            return Typecast(api_key=api_key, session=_DeadlineSession(cancel))
         return Typecast(api_key=api_key)
 
+    def get_remaining_credits(self, api_key: str) -> int:
+        """Return the credits left on the key's current subscription."""
+        subscription = self._get_client(api_key).get_my_subscription()
+        self.key_limits.set_limit(api_key, subscription.limits.concurrency_limit)
+        return subscription.credits.plan_credits - subscription.credits.used_credits
+
     def get_voices(self, api_key: str, model: str = None):
         """List available voices, optionally filtered by model."""
+        cache_key = f"{key_fingerprint(api_key or '')}:{model or ''}"
+        if self.cache:
+            cached = self.cache.get_json("voices", cache_key)
+            if cached is not None:
+                return cached
+
         try:
             client = self._get_client(api_key)
             endpoint = "/v1/voices"
@@ -25,68 +100,166 @@ class TypecastService:
             # Direct API access to bypass library model validation
             response = client.session.get(f"{client.host}{endpoint}", params=params)
             response.raise_for_status()
-            return response.json()
+            voices = response.json()
+            if self.cache:
+                self.cache.set_json("voices", cache_key, voices, ttl=VOICES_CACHE_TTL)
+            return voices
 
         except Exception as e:
-            print(f"Error fetching voices: {e}")
+            log_event(logger, "voices.fetch_failed", logging.ERROR, error=str(e))
             raise
 
-    def get_voice_detail(self, api_key: str, voice_id: str):
-        """Fetch single voice details raw JSON."""
+    def get_voice_detail(self, api_key: str, voice_id: str) -> dict:
+        """Fetch one voice's V2 metadata, normalized to a dict.
+
+        Returns:
+            Dict with whichever of gender, age, use_cases and emotions (across
+            the voice's models) the API reported
+        """
         client = self._get_client(api_key)
-        endpoint = f"/v1/voices/{voice_id}"
-        response = client.session.get(f"{client.host}{endpoint}")
-        return response.json()
+        # Direct API access (like get_voices) so model versions the SDK does not know yet still parse
+        response = client.session.get(f"{client.host}/v2/voices/{voice_id}")
+        response.raise_for_status()
+        data = response.json()
+        if isinstance(data, list):
+            data = data[0] if data else {}
+        if not isinstance(data, dict):
+            return {}
+
+        emotions = []
+        for model in data.get("models") or []:
+            for emotion in (model.get("emotions") or []) if isinstance(model, dict) else []:
+                if emotion not in emotions:
+                    emotions.append(emotion)
+        detail = {
+            "gender": data.get("gender"),
+            "age": data.get("age"),
+            "use_cases": data.get("use_cases"),
+            "emotions": emotions or data.get("emotions"),
+        }
+        return {key: value for key, value in detail.items() if value}
+
+    # Upstream chunk limit and the number of chunks rendered in parallel per request
+    MAX_CHUNK_CHARS = 1500
+    MAX_WORKERS = 3
 
-    def _split_text(self, text: str, max_chars: int = 1500) -> list[str]:
-        """Split text into chunks ensuring no chunk exceeds max_chars."""
+    def _split_text(self, text: str, max_chars: int = MAX_CHUNK_CHARS,
+                    workers: int = MAX_WORKERS, language: str = None) -> list[str]:
+        """Split text into balanced chunks ensuring no chunk exceeds max_chars.
+
+        The chunk count is the smallest multiple of ``workers`` that fits the
+        text, so every wave of parallel upstream calls is fully used, and chunk
+        boundaries are placed on the sentence boundary nearest to an even split.
+        Runs in linear time over the text.
+        """
         if len(text) <= max_chars:
             return [text]
-            
+
+        units = sentence_spans(text, language=language, max_chars=max_chars)
+        if not units:
+            return [text]
+
+        # Chunks are slices of the original text, so separators between
+        # sentences are kept as written
+        first = units[0][0]
+        total = units[-1][1] - first
+        min_chunks = -(-total // max_chars)
+        waves = -(-min_chunks // workers)
+        target_count = min(waves * workers, len(units))
+        target = total / target_count
+
         chunks = []
-        current_chunk = ""
-        
-        # Split by sentence endings (.!?) followed by space
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        
-        for sentence in sentences:
-            # Handle extremely long single sentences (fallback split)
-            if len(sentence) > max_chars:
-                # If current chunk is not empty, push it
-                if current_chunk:
-                    chunks.append(current_chunk)
-                    current_chunk = ""
-                
-                # Split long sentence by comma or space
-                parts = re.split(r'(?<=[,])\s+', sentence)
-                for part in parts:
-                    if len(current_chunk) + len(part) + 1 <= max_chars:
-                        if current_chunk:
-                            current_chunk += " " + part
-                        else:
-                            current_chunk = part
-                    else:
-                        if current_chunk:
-                            chunks.append(current_chunk)
-                        current_chunk = part
-                        # If still too big, hard cut (unlikely but safe fallback)
-                        while len(current_chunk) > max_chars:
-                            chunks.append(current_chunk[:max_chars])
-                            current_chunk = current_chunk[max_chars:]
-                continue
-
-            if len(current_chunk) + len(sentence) + 1 <= max_chars:
-                if current_chunk:
-                    current_chunk += " " + sentence
-                else:
-                    current_chunk = sentence
-            else:
-                chunks.append(current_chunk)
-                current_chunk = sentence
-                
-        if current_chunk:
-            chunks.append(current_chunk)
-            
+        chunk_start = first
+
+        for (start, end), (_, previous_end) in zip(units[1:], units):
+            boundary = first + target * (len(chunks) + 1)
+            overflow = end - chunk_start > max_chars
+            # Cut here if taking the sentence overshoots the ideal boundary by
+            # more than stopping short of it would undershoot
+            closer = (end - boundary) > (boundary - previous_end)
+            if overflow or (closer and len(chunks) < target_count - 1):
+                chunks.append(text[chunk_start:previous_end])
+                chunk_start = start
+
+        chunks.append(text[chunk_start:units[-1][1]])
+        return chunks
+
+    def _repeated_segments(self, text: str, min_chars: int = DEDUP_MIN_CHARS) -> list[tuple[int, int]]:
+        """Find paragraphs, then sentences, whose exact text occurs more than once.
+
+        Returns:
+            Sorted, non-overlapping (start, end) spans of every occurrence
+        """
+        paragraphs = []
+        start = 0
+        for match in PARAGRAPH_BREAK_RE.finditer(text):
+            paragraphs.append((start, match.start()))
+            start = match.end()
+        paragraphs.append((start, len(text)))
+
+        def stripped(span):
+            start, end = span
+            segment = text[start:end]
+            start += len(segment) - len(segment.lstrip())
+            return start, start + len(segment.strip())
+
+        def repeated(spans):
+            counts = {}
+            for start, end in spans:
+                key = text[start:end]
+                counts[key] = counts.get(key, 0) + 1
+            return {key for key, count in counts.items() if count > 1 and len(key) >= min_chars}
+
+        paragraphs = [stripped(p) for p in paragraphs if text[p[0]:p[1]].strip()]
+        repeated_paragraphs = repeated(paragraphs)
+        segments = [p for p in paragraphs if text[p[0]:p[1]] in repeated_paragraphs]
+
+        sentences = []
+        for start, end in paragraphs:
+            if text[start:end] not in repeated_paragraphs:
+                sentences.extend((start + s, start + e) for s, e in sentence_spans(text[start:end]))
+        repeated_sentences = repeated(sentences)
+        segments.extend(s for s in sentences if text[s[0]:s[1]] in repeated_sentences)
+        return sorted(segments)
+
+    def plan_chunks(self, text: str) -> list[str]:
+        """Split text into chunks, giving repeated paragraphs and sentences chunks of their own.
+
+        Every occurrence of a repeated segment then produces identical chunks,
+        which generate_speech renders once and reuses at each position. Text
+        that fits one chunk is never split this way, and the deduplicated plan
+        is only used when the characters it saves outweigh its extra upstream
+        calls (DEDUP_CHARS_PER_CALL each).
+        """
+        plan = self._split_text(text)
+        if len(plan) == 1:
+            return plan
+        segments = self._repeated_segments(text)
+        if not segments:
+            return plan
+
+        deduplicated = self._dedup_plan(text, segments)
+        # generate_speech renders each distinct chunk once
+        calls, dedup_calls = set(plan), set(deduplicated)
+        saved = sum(map(len, calls)) - sum(map(len, dedup_calls))
+        if saved < DEDUP_CHARS_PER_CALL * (len(dedup_calls) - len(calls)):
+            return plan
+        return deduplicated
+
+    def _dedup_plan(self, text: str, segments: list[tuple[int, int]]) -> list[str]:
+        """Chunks of text with each repeated segment split on its own."""
+        chunks = []
+        position = 0
+        for start, end in segments:
+            between = text[position:start].strip()
+            if between:
+                chunks.extend(self._split_text(between))
+            # One worker: the same segment must always split the same way
+            chunks.extend(self._split_text(text[start:end], workers=1))
+            position = end
+        tail = text[position:].strip()
+        if tail:
+            chunks.extend(self._split_text(tail))
         return chunks
 
     def _combine_wav_audio(self, audio_segments: list[bytes]) -> bytes:
@@ -115,28 +288,207 @@ class TypecastService:
             
             return bytes(header) + bytes(combined_data)
         except Exception as e:
-            print(f"Error combining WAV segments: {e}")
+            log_event(logger, "audio.combine_failed", logging.ERROR, error=str(e), segments=len(audio_segments))
             # Fallback: return first segment or empty
             return audio_segments[0] if audio_segments else b""
 
+    def _wav_silence(self, like: bytes, seconds: float) -> bytes:
+        """A WAV segment of silence in the same format as ``like`` (44-byte header assumed)."""
+        byte_rate = struct.unpack_from('<I', like, 28)[0]
+        block_align = struct.unpack_from('<H', like, 32)[0] or 1
+        data_size = int(byte_rate * seconds) // block_align * block_align
+        return bytes(like[:44]) + bytes(data_size)
+
+    def generate_script(self, api_key: str, segments: list[dict], model: str = "ssfm-v21",
+                        audio_format: str = "wav", pause: float = 0.0, priority: str = "standard",
+                        cancel: CancelToken = None):
+        """Render a multi-voice script into one audio file.
+
+        Segments are rendered in parallel (each through generate_speech, so
+        long segments are chunked, cached and billed as usual) and their
+        upstream calls share the key's concurrency limit.
+
+        Args:
+            segments: One dict per line with "text", "voice_id" and optional
+                emotion_preset, emotion_intensity, speed, pitch, volume, seed
+            pause: Seconds of silence between segments (WAV only)
+            priority: Scheduler class for the segments' upstream calls
+            cancel: Token that stops the whole script; the first failing segment cancels it
+
+        Returns:
+            (audio_bytes, total_duration, timings) where timings lists each
+            segment's index, voice_id, start and end in seconds
+        """
+        import concurrent.futures
+
+        # Check the whole script is affordable before rendering any of it;
+        # each segment reserves its own credits when it starts
+        self.credits.reserve(api_key, sum(estimate_credits(seg["text"]) for seg in segments), hold=False)
+        if cancel is None:
+            cancel = CancelToken()
+
+        def render(segment):
+            settings = {k: v for k, v in segment.items() if k != "text"}
+            return self.generate_speech(
+                api_key=api_key, text=segment["text"], model=model, audio_format=audio_format,
+                priority=priority, cancel=cancel, **settings
+            )
+
+        results = [None] * len(segments)
+        workers = max(1, min(len(segments), self.key_limits.limit(api_key)))
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {
+                executor.submit(contextvars.copy_context().run, render, segment): i
+                for i, segment in enumerate(segments)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                results[futures[future]] = future.result()
+        except BaseException as e:
+            # Stop the segments still rendering; they return promptly once they see the token
+            cancel.cancel(getattr(e, "reason", None) or f"CANCELLED: another script segment failed: {e}")
+            raise
+        finally:
+            # Segments that have not started yet are not rendered
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        wav = audio_format.lower() == "wav"
+        parts, timings = [], []
+        position = 0.0
+        for i, (segment, (audio, duration)) in enumerate(zip(segments, results)):
+            if i and wav and pause > 0:
+                parts.append(self._wav_silence(audio, pause))
+                position += pause
+            parts.append(audio)
+            timings.append({
+                "index": i,
+                "voice_id": segment["voice_id"],
+                "start": round(position, 3),
+                "end": round(position + duration, 3),
+            })
+            position += duration
+
+        with time_stage("combine_audio"):
+            combined = self._combine_wav_audio(parts) if wav else b"".join(parts)
+        return combined, position, timings
+
+    @staticmethod
+    def _chunk_cache_keys(chunks: list[str], voice_id, model, emotion_preset, emotion_intensity,
+                          pitch, speed, volume, audio_format, seed) -> list[str]:
+        """Audio cache key of each chunk under the given render settings."""
+        # Everything besides the chunk text that affects the rendered audio
+        settings = json.dumps(
+            [voice_id, model, emotion_preset, emotion_intensity, pitch, speed, volume, audio_format, seed]
+        )
+        return [hashlib.sha256(f"{settings}\n{chunk}".encode("utf-8")).hexdigest() for chunk in chunks]
+
+    def _cached_duration(self, key: str) -> float | None:
+        """Duration of a cached chunk without loading its audio, or None if it is not cached.
+
+        Reads the small "audio_meta" entry written next to the audio; chunks
+        cached before it existed fall back to the audio entry once and get one.
+        """
+        if not self.cache:
+            return None
+        meta = self.cache.get_json("audio_meta", key)
+        if meta is not None:
+            return meta["duration"]
+        cached = self.cache.get("audio", key)
+        if cached is None:
+            return None
+        duration = struct.unpack("<d", cached[:8])[0]
+        self.cache.set_json("audio_meta", key, {"duration": duration}, ttl=AUDIO_CACHE_TTL)
+        return duration
+
+    def plan_render(self, api_key: str, chunks: list[str], voice_id: str, emotion_preset: str = None,
+                    emotion_intensity: float = 1.0, speed: float = 1.0, pitch: int = 0,
+                    tempo: float = 1.0, model: str = "ssfm-v21", volume: int = 100,
+                    audio_format: str = "wav", seed: int = None) -> dict:
+        """Predict what generate_speech would do with a chunk plan, without rendering anything.
+
+        Returns:
+            Dict with per-chunk details ("chunks": text, characters, cached,
+            audio_seconds, upstream_seconds), "billable_characters", "affordable",
+            "predicted_duration", "predicted_wall_seconds" and "concurrency".
+            Cached chunks report their actual duration and cost nothing.
+        """
+        cache_keys = self._chunk_cache_keys(
+            chunks, voice_id, model, emotion_preset, emotion_intensity, pitch, speed, volume, audio_format, seed
+        )
+        details, latencies, seen = [], {}, {}
+        for i, (chunk, key) in enumerate(zip(chunks, cache_keys)):
+            if key not in seen:
+                seen[key] = self._cached_duration(key)
+                if seen[key] is None:
+                    latencies[i] = self.estimates.upstream_seconds(model, len(chunk))
+            known = seen[key]
+            details.append({
+                "index": i,
+                "text": chunk,
+                "characters": len(chunk),
+                "cached": known is not None,
+                # Repeats of a chunk reuse its audio, so only the first occurrence is rendered
+                "rendered": i in latencies,
+                "audio_seconds": round(known if known is not None
+                                       else self.estimates.audio_seconds(voice_id, len(chunk), speed), 3),
+                "upstream_seconds": round(latencies[i], 3) if i in latencies else 0.0,
+            })
+
+        # Checking the balance also loads the key's plan concurrency limit
+        try:
+            self.credits.reserve(api_key, sum(estimate_credits(chunks[i]) for i in latencies), hold=False)
+            affordable = True
+        except InsufficientCreditsError:
+            affordable = False
+
+        concurrency = self.key_limits.limit(api_key)
+        order = lpt_order(latencies)
+        return {
+            "chunks": details,
+            "billable_characters": sum(len(chunks[i]) for i in latencies),
+            "affordable": affordable,
+            "predicted_duration": round(sum(d["audio_seconds"] for d in details), 3),
+            "predicted_wall_seconds": round(simulate_wall_time([latencies[i] for i in order], concurrency), 3),
+            "concurrency": concurrency,
+        }
+
+    def _settle_chunk(self, api_key: str, cost: int, future) -> None:
+        """Settle the reservation of a chunk that finished after its request stopped waiting."""
+        if not future.cancelled() and future.exception() is None:
+            self.credits.spend(api_key, cost)
+        else:
+            self.credits.release(api_key, cost)
+
     def generate_speech(self, api_key: str, text: str, voice_id: str, emotion_preset: str = None, 
                         emotion_intensity: float = 1.0, speed: float = 1.0, 
                         pitch: int = 0, tempo: float = 1.0, model: str = "ssfm-v21",
-                        volume: int = 100, audio_format: str = "wav", seed: int = None):
+                        volume: int = 100, audio_format: str = "wav", seed: int = None,
+                        chunks: list[str] = None, priority: str = "standard",
+                        cancel: CancelToken = None):
         """Generate speech from text with full parameter control.
         
         Args:
             volume: Audio volume (0-200, default 100)
             audio_format: Output format ("wav" or "mp3")
             seed: Random seed for reproducibility
+            chunks: Chunk plan to render instead of planning text (see plan_chunks)
+            priority: Scheduler class for the upstream calls ("interactive", "standard" or "bulk")
+            cancel: Token that stops the render early (client gone, deadline passed)
+
+        Raises:
+            RenderCancelled: If the token is cancelled before every chunk is ready
         """
         import concurrent.futures
 
         try:
             # client = self._get_client(api_key) # Do not share client across threads
             
-            chunks = self._split_text(text)
-            print(f"Processing text in {len(chunks)} chunks (Total length: {len(text)})")
+            if chunks is None:
+                with time_stage("split_text"):
+                    chunks = self.plan_chunks(text)
+            CHUNKS_PER_REQUEST.observe(len(chunks))
+            log_event(logger, "tts.request", chunks=len(chunks), unique_chunks=len(set(chunks)),
+                      text_length=len(text), model=model)
             
             # Prepare segments array to preserve order
             audio_segments = [None] * len(chunks)
@@ -154,53 +506,133 @@ class TypecastService:
                 volume=volume
             )
             
+            # Reuse cached chunks; only the rest are sent upstream (and paid for).
+            # Repeated chunks share a key, so each unique chunk is rendered once
+            # and its audio placed at every position it occurs
+            cache_keys = self._chunk_cache_keys(
+                chunks, voice_id, model, emotion_preset, emotion_intensity, pitch, speed, volume, audio_format, seed
+            )
+            positions = {}
+            for i, key in enumerate(cache_keys):
+                positions.setdefault(key, []).append(i)
+            pending = []
+            for key, indices in positions.items():
+                cached = self.cache.get("audio", key) if self.cache else None
+                if cached is not None:
+                    for i in indices:
+                        audio_segments[i] = cached[8:]
+                    total_duration += struct.unpack("<d", cached[:8])[0] * len(indices)
+                else:
+                    pending.append(indices[0])
+
+            if cancel is not None:
+                cancel.check()
+
+            # Reject up front if the key cannot pay for every pending chunk
+            costs = {i: estimate_credits(chunks[i]) for i in pending}
+            reserved = sum(costs.values())
+            self.credits.reserve(api_key, reserved)
+
             # Helper function for parallel execution
             def process_chunk(index, chunk):
-                print(f"Generating chunk {index+1}/{len(chunks)} (len: {len(chunk)})")
+                log_event(logger, "tts.chunk_start", logging.DEBUG, chunk=index + 1, chunks=len(chunks), length=len(chunk))
                 try:
+                    if cancel is not None:
+                        cancel.check()
                     # Instantiate a NEW client for each thread/request to ensure thread safety
                     # The Typecast client might not be thread-safe regarding requests session
-                    local_client = self._get_client(api_key)
+                    local_client = self._get_client(api_key, cancel)
                     
-                    res = local_client.text_to_speech(TTSRequest(
-                        text=chunk,
-                        model=model,
-                        voice_id=voice_id,
-                        prompt=prompt,
-                        output=output_config
-                    ))
-                    return index, res.audio_data, float(res.duration)
+                    started = time.perf_counter()
+                    with UPSTREAM_IN_FLIGHT.track_inprogress():
+                        res = local_client.text_to_speech(TTSRequest(
+                            text=chunk,
+                            model=model,
+                            voice_id=voice_id,
+                            prompt=prompt,
+                            output=output_config
+                        ))
+                    latency = time.perf_counter() - started
+                    observe_upstream(model, len(chunk), latency)
+                    duration = float(res.duration)
+                    self.estimates.observe(voice_id, model, speed, len(chunk), duration, latency)
+                    if self.cache:
+                        self.cache.set("audio", cache_keys[index], struct.pack("<d", duration) + res.audio_data,
+                                       ttl=AUDIO_CACHE_TTL)
+                        self.cache.set_json("audio_meta", cache_keys[index], {"duration": duration},
+                                            ttl=AUDIO_CACHE_TTL)
+                    return index, res.audio_data, duration
+                except RenderCancelled:
+                    raise
                 except Exception as e:
-                    print(f"Error generating chunk {index+1}: {e}")
+                    UPSTREAM_ERRORS.labels(model, type(e).__name__).inc()
+                    log_event(logger, "tts.chunk_failed", logging.ERROR, chunk=index + 1, chunks=len(chunks), error=str(e))
+                    if isinstance(e, requests.Timeout) and cancel is not None and cancel.cancelled:
+                        # The upstream call was cut off at the render's deadline
+                        raise RenderCancelled(cancel.reason) from e
                     raise
 
-            # Execute similarly to Promise.all in JS
-            # Reduced max_workers to 3 to be safer against rate limits and server load
-            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-                # Submit all tasks
-                future_to_chunk = {executor.submit(process_chunk, i, chunk): i for i, chunk in enumerate(chunks)}
-                
-                for future in concurrent.futures.as_completed(future_to_chunk):
-                    try:
-                        idx, data, duration = future.result()
-                        audio_segments[idx] = data
-                        total_duration += duration
-                    except Exception as e:
-                         # If one chunk fails, likely all will fail or the result is invalid
-                        raise e
+            # Execute similarly to Promise.all in JS, on the shared scheduler so
+            # the key's concurrency limit holds across all of its requests
+            future_to_chunk = {}
+            try:
+                with time_stage("upstream_tts"):
+                    # Longest predicted chunks first, so the request does not end on one slow straggler
+                    order = lpt_order({i: self.estimates.upstream_seconds(model, len(chunks[i])) for i in pending})
+                    future_to_chunk = {
+                        self.scheduler.submit(api_key, process_chunk, i, chunks[i], priority=priority): i
+                        for i in order
+                    }
+                    
+                    not_done = set(future_to_chunk)
+                    while not_done:
+                        done, not_done = concurrent.futures.wait(
+                            not_done, timeout=CANCEL_POLL_SECONDS, return_when=concurrent.futures.FIRST_COMPLETED,
+                        )
+                        for future in done:
+                            try:
+                                idx, data, duration = future.result()
+                            except PaymentRequiredError:
+                                self.credits.mark_exhausted(api_key)
+                                raise
+                            # If one chunk fails, likely all will fail or the result is invalid
+                            for i in positions[cache_keys[idx]]:
+                                audio_segments[i] = data
+                                total_duration += duration
+                            self.credits.spend(api_key, costs[idx])
+                            reserved -= costs[idx]
+                            del future_to_chunk[future]
+                        if cancel is not None:
+                            cancel.check()
+            finally:
+                # Fail fast: chunks still queued are dropped, chunks already upstream
+                # are abandoned and settle their own credits when they finish
+                for future, idx in future_to_chunk.items():
+                    if future.cancel():
+                        self.credits.release(api_key, costs[idx])
+                    else:
+                        future.add_done_callback(
+                            lambda f, cost=costs[idx]: self._settle_chunk(api_key, cost, f)
+                        )
+                    reserved -= costs[idx]
+                self.credits.release(api_key, reserved)
 
             if len(audio_segments) == 1:
                 return audio_segments[0], total_duration
             
             # Only support WAV combining for now
-            if audio_format.lower() == "wav":
-                combined_audio = self._combine_wav_audio(audio_segments)
-                return combined_audio, total_duration
-            else:
-                # Handle MP3 simplistic concatenation (usually works)
-                combined = b"".join(audio_segments)
-                return combined, total_duration
+            with time_stage("combine_audio"):
+                if audio_format.lower() == "wav":
+                    combined_audio = self._combine_wav_audio(audio_segments)
+                    return combined_audio, total_duration
+                else:
+                    # Handle MP3 simplistic concatenation (usually works)
+                    combined = b"".join(audio_segments)
+                    return combined, total_duration
             
+        except RenderCancelled as e:
+            log_event(logger, "tts.cancelled", reason=e.reason)
+            raise
         except TypecastError as e:
-            print(f"Error generating speech: {e}")
+            log_event(logger, "tts.failed", logging.ERROR, error=str(e))
             raise
@@ -0,0 +1,153 @@
+"""
+Voice Details - Background job that fetches per-voice details (gender, age,
+use cases, emotions) from Typecast's V2 voice API and keeps them for the
+/voices index.
+
+Details are fetched off the request path with bounded concurrency and retry,
+persisted in the shared cache with a per-voice TTL (so other workers and
+restarts reuse them), and held in memory for enrich_voices. A /voices request
+only reads the in-memory index and, if voices are missing or stale, schedules
+a job; it never waits on per-voice upstream calls.
+"""
+
+import concurrent.futures
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from typecast.exceptions import NotFoundError, TypecastError
+from requests import HTTPError
+
+from structured_logging import log_event
+
+logger = logging.getLogger(__name__)
+
+# Details are refreshed after DETAIL_TTL seconds (+/- 20% per voice, so
+# refreshes spread out) and dropped from the shared cache after twice that
+DETAIL_TTL = float(os.getenv("VOICE_DETAIL_TTL", 7 * 24 * 3600))
+DETAIL_CONCURRENCY = int(os.getenv("VOICE_DETAIL_CONCURRENCY", 4))
+DETAIL_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5
+
+# Voices whose fetch failed are retried after this many seconds
+FAILURE_RETRY_AFTER = 300.0
+
+# Results are published to the index this many voices at a time, so a long
+# first job still fills /voices progressively without copying it per voice
+STORE_BATCH = 50
+
+
+def _is_not_found(error: Exception) -> bool:
+    if isinstance(error, NotFoundError):
+        return True
+    response = getattr(error, "response", None)
+    return isinstance(error, HTTPError) and response is not None and response.status_code == 404
+
+
+class VoiceDetailEnricher:
+    """In-memory voice detail index filled by a single background job at a time."""
+
+    def __init__(self, service, cache, ttl: float = DETAIL_TTL, concurrency: int = DETAIL_CONCURRENCY):
+        self.service = service
+        self.cache = cache
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self._details: Dict[str, Dict] = {}
+        self.version = 0  # Bumped whenever a voice's details change
+        self._refresh_after: Dict[str, float] = {}
+        self._job: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._store_lock = threading.Lock()
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Details by voice id. Never blocks on upstream."""
+        return self._details
+
+    def _stale(self, voice_ids: Iterable[str]) -> List[str]:
+        now = time.time()
+        return [v for v in voice_ids if self._refresh_after.get(v, 0.0) <= now]
+
+    def schedule(self, api_key: str, voice_ids: Iterable[str]) -> bool:
+        """Start a background job for missing or stale voices unless one is already running."""
+        voice_ids = [v for v in voice_ids if v]
+        if not api_key or not self._stale(voice_ids):
+            return False
+        with self._lock:
+            if self._job is not None and self._job.is_alive():
+                return False
+            self._job = threading.Thread(
+                target=self.run, args=(api_key, voice_ids), name="voice-details", daemon=True
+            )
+            self._job.start()
+            return True
+
+    def _store(self, results: List[tuple]) -> None:
+        """Apply (voice_id, detail, refresh_after) results in one swap."""
+        # Replace the whole dict so readers iterating a snapshot are unaffected
+        with self._store_lock:
+            details = None
+            for voice_id, detail, refresh_after in results:
+                self._refresh_after[voice_id] = refresh_after
+                if self._details.get(voice_id) != detail:
+                    if details is None:
+                        details = dict(self._details)
+                    details[voice_id] = detail
+            if details is not None:
+                self._details = details
+                self.version += 1
+
+    def _fetch(self, api_key: str, voice_id: str) -> Optional[Dict]:
+        """Fetch one voice's details, retrying transient failures with backoff."""
+        for attempt in range(DETAIL_ATTEMPTS):
+            try:
+                return self.service.get_voice_detail(api_key, voice_id)
+            except (TypecastError, HTTPError, OSError) as e:
+                if _is_not_found(e):
+                    return {}
+                if attempt == DETAIL_ATTEMPTS - 1:
+                    log_event(logger, "voice_details.fetch_failed", logging.WARNING,
+                              voice_id=voice_id, attempts=DETAIL_ATTEMPTS, error=str(e))
+                    return None
+                time.sleep(RETRY_BASE_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+        return None
+
+    def _refresh_one(self, api_key: str, voice_id: str) -> tuple:
+        """Returns (outcome, (voice_id, detail, refresh_after)) for _store."""
+        now = time.time()
+        entry = self.cache.get_json("voice_detail", voice_id)
+        if entry is not None and not isinstance(entry.get("detail"), dict):
+            entry = None  # Written by an older version that stored the raw V1 list
+        if entry is not None and entry["refresh_after"] > now:
+            return "cached", (voice_id, entry["detail"], entry["refresh_after"])
+
+        detail = self._fetch(api_key, voice_id)
+        if detail is None:
+            # Keep serving what we had and try again on a later job
+            previous = entry["detail"] if entry else self._details.get(voice_id, {})
+            return "failed", (voice_id, previous, now + FAILURE_RETRY_AFTER)
+
+        refresh_after = now + self.ttl * random.uniform(0.8, 1.2)
+        self.cache.set_json("voice_detail", voice_id, {"detail": detail, "refresh_after": refresh_after},
+                            ttl=self.ttl * 2)
+        return "fetched", (voice_id, detail, refresh_after)
+
+    def run(self, api_key: str, voice_ids: List[str]) -> Dict[str, int]:
+        """Refresh details for the stale voices among voice_ids. Returns counts by outcome."""
+        stale = self._stale(voice_ids)
+        started = time.perf_counter()
+        outcomes = {"cached": 0, "fetched": 0, "failed": 0}
+        batch = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for outcome, result in executor.map(lambda v: self._refresh_one(api_key, v), stale):
+                outcomes[outcome] += 1
+                batch.append(result)
+                if len(batch) >= STORE_BATCH:
+                    self._store(batch)
+                    batch = []
+        self._store(batch)
+        log_event(logger, "voice_details.refreshed", voices=len(stale),
+                  seconds=round(time.perf_counter() - started, 2), **outcomes)
+        return outcomes
@@ -0,0 +1,95 @@
+"""
+Voice Enrichment - Adds gender, language, style, age and avatar metadata to raw Typecast voices.
+"""
+
+from typing import Dict, List, Optional
+
+from metadata_catalog import CatalogSnapshot
+
+# Full list of 27 supported languages from Typecast ssfm-v21 documentation
+# ssfm-v21 model is MULTILINGUAL - ALL voices support 27 languages per official docs
+# https://typecast.ai/docs/models
+SSFM_V21_LANGUAGES = [
+    "en", "ko", "zh", "es", "ar", "pt", "ru", "ja", "de", "fr",
+    "id", "it", "ms", "pl", "nl", "uk", "el", "ta", "sv", "cs",
+    "da", "fi", "tl", "sk", "bg", "hr", "ro"
+]
+
+
+def _detail_label(value: Optional[str]) -> Optional[str]:
+    """Turn a detail enum such as 'young_adult' into a display label ('Young Adult')."""
+    return value.replace("_", " ").title() if isinstance(value, str) and value else None
+
+
+def enrich_voice(v: Dict, meta: CatalogSnapshot, detail: Optional[Dict] = None) -> Dict:
+    """Build the /voices entry for one raw voice using the metadata catalog.
+
+    ``detail`` is the voice's cached detail response, if any; the hand-maintained
+    maps still take precedence over it.
+    """
+    name = v.get("name", v.get("voice_name", "Unknown"))
+    voice_id = v.get("voice_id")
+    detail = detail if isinstance(detail, dict) else {}
+
+    # Determine Gender
+    gender = "Unknown"
+    if name in meta.gender:
+        gender = meta.gender[name]
+    elif _detail_label(detail.get("gender")):
+        gender = _detail_label(detail.get("gender"))
+    elif "(M)" in name or " Male" in name:
+        gender = "Male"
+    elif "(F)" in name or " Female" in name:
+        gender = "Female"
+
+    # Determine NATIVE Language (provider data, then map, then script heuristics)
+    native_language = meta.resolver.resolve(
+        name, v.get("language") or v.get("lang") or v.get("locale")
+    )
+
+    # Construct Supported Languages List
+    # The native_language indicates the voice's origin/accent, but can speak all languages
+    # Put native language first, then all other supported languages
+    supported_languages = [native_language]
+    for lang in SSFM_V21_LANGUAGES:
+        if lang != native_language:
+            supported_languages.append(lang)
+
+    # Get Style from map
+    styles = meta.style[name] if name in meta.style else detail.get("use_cases") or ["Conversational"]  # Default to Conversational
+
+    # Get Age Group from map (overrides API if available)
+    age_group = meta.age.get(name, v.get("age_range") or _detail_label(detail.get("age")) or "Young Adult")
+
+    # Construct Avatar URL
+    image_url = v.get("image_url")
+    if not image_url:
+        # 1. Try avatar map first (scraped from Typecast website)
+        if name in meta.avatar:
+            image_url = meta.avatar[name]
+        else:
+            # 2. Fallback to /All/{name}.webp pattern
+            safe_name = name.lower().replace(" ", "")
+            if "(" in safe_name:
+                safe_name = safe_name.split("(")[0]
+            image_url = f"https://static2.typecast.ai/c/All/{safe_name}.webp"
+
+    return {
+        "voice_id": voice_id,
+        "name": name,
+        "emotions": v.get("emotions") or detail.get("emotions", []),
+        "model": v.get("model"),
+        "gender": gender,
+        "languages": supported_languages,
+        "native_language": native_language,
+        "age_range": age_group,
+        "styles": styles,
+        "image_url": image_url
+    }
+
+
+def enrich_voices(voices: List[Dict], meta: CatalogSnapshot,
+                  details: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+    """Enrich every voice returned by the provider, using cached voice details where available."""
+    details = details or {}
+    return [enrich_voice(v, meta, details.get(v.get("voice_id"))) for v in voices]
@@ -0,0 +1,171 @@
+"""
+Voice Preview - Renders a standard phrase per voice, model and language once,
+keeps it in the shared cache, and pre-renders the most requested previews in
+the background so browsing the voice list does not spend credits.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from structured_logging import log_event
+
+logger = logging.getLogger(__name__)
+
+# Standard preview phrase per language; other languages use English
+PREVIEW_PHRASES: Dict[str, str] = {
+    "en": "Hello, I am ready to create content for you.",
+    "ko": "안녕하세요, 당신을 위한 콘텐츠를 만들 준비가 되었습니다.",
+    "ja": "こんにちは、あなたのためのコンテンツを作る準備ができています。",
+    "zh": "你好，我已经准备好为你创作内容了。",
+    "es": "Hola, estoy listo para crear contenido para ti.",
+    "fr": "Bonjour, je suis prêt à créer du contenu pour vous.",
+    "de": "Hallo, ich bin bereit, Inhalte für dich zu erstellen.",
+    "pt": "Olá, estou pronto para criar conteúdo para você.",
+    "it": "Ciao, sono pronto a creare contenuti per te.",
+}
+DEFAULT_MODEL = "ssfm-v21"
+
+PREVIEW_CACHE_TTL = 30 * 24 * 3600
+
+# Background pre-rendering (needs TYPECAST_API_KEY): how many of the most
+# requested previews to keep warm, how often, and voices always kept warm
+PRERENDER_TOP = int(os.getenv("PREVIEW_PRERENDER_TOP", 20))
+PRERENDER_INTERVAL = float(os.getenv("PREVIEW_PRERENDER_INTERVAL", 3600))
+PRERENDER_VOICES = [v.strip() for v in os.getenv("PREVIEW_VOICES", "").split(",") if v.strip()]
+
+# Most previews whose popularity is tracked; past this the least requested half is dropped
+MAX_COUNTED_PREVIEWS = int(os.getenv("PREVIEW_MAX_COUNTED", 5000))
+
+PreviewKey = Tuple[str, str, str]  # (voice_id, model, language)
+
+
+def preview_phrase(language: Optional[str]) -> Tuple[str, str]:
+    """Return (language, phrase), falling back to English for languages without a phrase."""
+    language = (language or "en").lower()
+    if language not in PREVIEW_PHRASES:
+        language = "en"
+    return language, PREVIEW_PHRASES[language]
+
+
+class VoicePreviews:
+    """Cached voice previews with single-flight rendering and background warm-up."""
+
+    def __init__(self, service, cache):
+        self.service = service
+        self.cache = cache
+        self.requests: Counter = Counter()
+        self._requests_lock = threading.Lock()
+        # cache key -> [lock, renders holding or waiting for it]; dropped when unused
+        self._locks: Dict[str, list] = {}
+        self._locks_lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(key: PreviewKey) -> str:
+        voice_id, model, language = key
+        # Changing a phrase changes the key, so stale renderings are never served
+        phrase_hash = hashlib.sha256(PREVIEW_PHRASES[language].encode("utf-8")).hexdigest()[:8]
+        return f"{voice_id}:{model}:{language}:{phrase_hash}"
+
+    @staticmethod
+    def etag(audio: bytes) -> str:
+        return '"' + hashlib.sha256(audio).hexdigest()[:20] + '"'
+
+    def key(self, voice_id: str, model: Optional[str] = None, language: Optional[str] = None) -> PreviewKey:
+        return voice_id, model or DEFAULT_MODEL, preview_phrase(language)[0]
+
+    def resolve(self, voices: Iterable[dict], voice_id: str, model: Optional[str] = None,
+                language: Optional[str] = None) -> Optional[PreviewKey]:
+        """
+        Preview key for a voice in a voice list, or None if the list has no such voice or model.
+
+        Without a model, DEFAULT_MODEL is used if the voice has it, else the voice's first model.
+        """
+        models = [voice.get("model") for voice in voices if voice.get("voice_id") == voice_id]
+        if not models:
+            return None
+        known = [m for m in models if m]
+        if model is None:
+            model = DEFAULT_MODEL if DEFAULT_MODEL in known or not known else known[0]
+        elif known and model not in known:
+            return None
+        return self.key(voice_id, model, language)
+
+    def cached(self, key: PreviewKey) -> Optional[bytes]:
+        """Return the cached preview, counting the request towards popularity (see resolve)."""
+        with self._requests_lock:
+            self.requests[key] += 1
+            if len(self.requests) > MAX_COUNTED_PREVIEWS:
+                self.requests = Counter(dict(self.requests.most_common(MAX_COUNTED_PREVIEWS // 2)))
+        return self.cache.get("preview", self._cache_key(key))
+
+    def render(self, key: PreviewKey, api_key: str, priority: str = "interactive") -> bytes:
+        """Render and cache a preview; concurrent calls for the same preview render it once."""
+        cache_key = self._cache_key(key)
+        with self._locks_lock:
+            entry = self._locks.setdefault(cache_key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                return self._render(key, cache_key, api_key, priority)
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[cache_key]
+
+    def _render(self, key: PreviewKey, cache_key: str, api_key: str, priority: str) -> bytes:
+        audio = self.cache.get("preview", cache_key)
+        if audio is not None:
+            return audio
+
+        voice_id, model, language = key
+        audio, _ = self.service.generate_speech(
+            api_key=api_key,
+            text=PREVIEW_PHRASES[language],
+            voice_id=voice_id,
+            emotion_preset=None,
+            model=model,
+            priority=priority,
+        )
+        self.cache.set("preview", cache_key, audio, ttl=PREVIEW_CACHE_TTL)
+        log_event(logger, "preview.rendered", voice_id=voice_id, model=model, language=language)
+        return audio
+
+    def _warm_keys(self) -> List[PreviewKey]:
+        with self._requests_lock:
+            keys = [key for key, _ in self.requests.most_common(PRERENDER_TOP)]
+        keys.extend(self.key(voice_id) for voice_id in PRERENDER_VOICES)
+        return list(dict.fromkeys(keys))
+
+    def prerender(self, api_key: str) -> int:
+        """Render every popular or configured preview that is not cached yet. Returns the number rendered."""
+        rendered = 0
+        for key in self._warm_keys():
+            if self.cache.get("preview", self._cache_key(key)) is not None:
+                continue
+            try:
+                # Background warm-up must not delay anyone's interactive previews
+                self.render(key, api_key, priority="bulk")
+                rendered += 1
+            except Exception as e:
+                log_event(logger, "preview.prerender_failed", logging.WARNING, voice_id=key[0], error=str(e))
+        return rendered
+
+    def start_prerender(self, api_key: Optional[str]) -> Optional[threading.Thread]:
+        """Start the background warm-up loop if a server API key is configured."""
+        if not api_key or (PRERENDER_TOP <= 0 and not PRERENDER_VOICES):
+            return None
+
+        def loop():
+            while True:
+                self.prerender(api_key)
+                time.sleep(PRERENDER_INTERVAL)
+
+        thread = threading.Thread(target=loop, name="preview-prerender", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,155 @@
+"""
+Voices Payload - Serialized and pre-compressed /voices responses.
+
+The enriched voice list only changes when the provider's list, the metadata
+catalog or the cached voice details change, so it is serialized once per
+version and compressed once per encoding (identity, gzip and, if the brotli
+package is installed, br). Requests pick a variant by Accept-Encoding and are
+served the stored bytes as-is.
+
+A new payload is compressed at fast settings on the request that builds it;
+a background worker then recompresses it at the strongest settings and swaps
+the smaller bodies in. The list changes whenever voice details arrive, so the
+slow settings never run on the request path.
+"""
+
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Response
+
+from key_limits import key_fingerprint
+
+try:
+    import brotli
+except ImportError:  # Optional: fall back to gzip
+    brotli = None
+
+# Keep payloads for this many (api key, model) combinations
+MAX_PAYLOADS = 64
+
+# (gzip level, brotli quality) on the request path, and for the background upgrade
+FAST_LEVELS = (6, 5)
+BEST_LEVELS = (9, 11)
+
+# One background thread recompresses payloads, newest first
+_upgrader = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="voices-payload")
+
+PayloadKey = Tuple[str, str, str, int]  # (api key fingerprint, model, catalog version, details version)
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+@dataclass
+class VoicesPayload:
+    """One serialized voice list with its compressed variants."""
+    voice_ids: List[str]
+    etag: str
+    created_at: float
+    variants: Dict[str, bytes] = field(default_factory=dict)  # Content-Encoding -> body
+
+    def choose(self, accept_encoding: Optional[str]) -> str:
+        """Pick the smallest variant the client accepts."""
+        accepted = _accepted_encodings(accept_encoding)
+        wildcard = accepted.get("*", 0.0)
+        for coding in ("br", "gzip"):
+            if coding in self.variants and accepted.get(coding, wildcard) > 0:
+                return coding
+        return "identity"
+
+    def response(self, accept_encoding: Optional[str], if_none_match: Optional[str]) -> Response:
+        coding = self.choose(accept_encoding)
+        # Each encoding is a different representation, so it gets its own entity tag
+        etag = self.etag if coding == "identity" else f'{self.etag[:-1]}-{coding}"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "private, no-cache"}
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.variants[coding], media_type="application/json", headers=headers)
+
+    def compress(self, levels: Tuple[int, int]) -> None:
+        """(Re)build the compressed variants at (gzip level, brotli quality)."""
+        body = self.variants["identity"]
+        variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=levels[0], mtime=0)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(body, quality=levels[1])
+        # Swapped in whole; a concurrent response sees either the old or the new set
+        self.variants = variants
+
+
+def build_payload(voices: List[Dict]) -> VoicesPayload:
+    """Serialize enriched voices the way FastAPI would and compress every variant at FAST_LEVELS."""
+    body = json.dumps(voices, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    payload = VoicesPayload(
+        voice_ids=[v.get("voice_id") for v in voices],
+        etag='"' + hashlib.sha256(body).hexdigest()[:20] + '"',
+        created_at=time.monotonic(),
+    )
+    payload.variants["identity"] = body
+    payload.compress(FAST_LEVELS)
+    return payload
+
+
+class VoicesPayloadCache:
+    """Bounded map from payload key to VoicesPayload, expiring with the voice list cache."""
+
+    def __init__(self, ttl: float, max_entries: int = MAX_PAYLOADS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._payloads: "OrderedDict[PayloadKey, VoicesPayload]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(api_key: str, model: Optional[str], catalog_version: str, details_version: int) -> PayloadKey:
+        return key_fingerprint(api_key), model or "", catalog_version, details_version
+
+    def get(self, key: PayloadKey) -> Optional[VoicesPayload]:
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is None:
+                return None
+            if time.monotonic() - payload.created_at > self.ttl:
+                del self._payloads[key]
+                return None
+            self._payloads.move_to_end(key)
+            return payload
+
+    def put(self, key: PayloadKey, payload: VoicesPayload) -> VoicesPayload:
+        """Store a payload and schedule its recompression at BEST_LEVELS."""
+        with self._lock:
+            self._payloads[key] = payload
+            self._payloads.move_to_end(key)
+            while len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
+        _upgrader.submit(self._upgrade, key, payload)
+        return payload
+
+    def _upgrade(self, key: PayloadKey, payload: VoicesPayload) -> None:
+        with self._lock:
+            current = self._payloads.get(key) is payload
+        if current:  # Skip payloads already replaced or evicted
+            payload.compress(BEST_LEVELS)
@@ -87,24 +87,13 @@ export const VoiceSelector: React.FC<VoiceSelectorProps> = ({ voices, selectedVo
         // Fetch New
         setPreviewStates(prev => ({ ...prev, [voiceId]: 'loading' }));
         try {
-            const response = await axios.post<{ audio_base64: string }>(`${config.API_BASE_URL}/generate`, {
-                text: "Hello, I am ready to create content for you.",
-
-                voice_id: voiceId,
-                emotion_preset: null,
-                speed: 1.0
-            }, {
-                headers: { 'x-api-key': apiKey }
+            // Previews are rendered once on the server and cached (also by the browser)
+            const response = await axios.get<Blob>(`${config.API_BASE_URL}/voices/${encodeURIComponent(voiceId)}/preview`, {
+                headers: { 'x-api-key': apiKey },
+                responseType: 'blob'
             });
 
-            // Base64 to Blob URL
-            const binaryString = window.atob(response.data.audio_base64);
-            const bytes = new Uint8Array(binaryString.length);
-            for (let i = 0; i < binaryString.length; i++) {
-                bytes[i] = binaryString.charCodeAt(i);
-            }
-            const blob = new Blob([bytes], { type: 'audio/wav' });
-            const url = URL.createObjectURL(blob);
+            const url = URL.createObjectURL(response.data);
 
             setAudioCache(prev => new Map(prev).set(voiceId, url));
             playAudio(voiceId, url);